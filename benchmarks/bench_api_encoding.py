@@ -0,0 +1,107 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the cost of encoding API requests
+
+This compares the old encoding (nested values dumped to JSON and then
+percent-encoded in the query string of a GET request) with the new one
+(a single JSON body sent with a POST request), for a typical keyboard and
+for a page of inline results.
+
+Run it with: python3 benchmarks/bench_api_encoding.py
+"""
+
+import json
+import timeit
+
+import requests
+
+
+URL = "https://api.telegram.org/bot123:ABC/sendMessage"
+
+
+def keyboard_params(rows=8, columns=5):
+    """Parameters of a message with a big inline keyboard"""
+    keyboard = [[
+        {"text": "Button %s.%s" % (row, column),
+         "callback_data": "bmFtZXNwYWNlOmNhbGxiYWNrOg==%s-%s" % (row, column)}
+        for column in range(columns)
+    ] for row in range(rows)]
+
+    return {
+        "chat_id": -1001234567890,
+        "text": "Choose one of the options below",
+        "reply_markup": {"inline_keyboard": keyboard},
+    }
+
+
+def inline_params(results=50):
+    """Parameters of a page of inline results"""
+    return {
+        "inline_query_id": "1234567890",
+        "cache_time": 300,
+        "is_personal": False,
+        "next_offset": results,
+        "results": [{
+            "type": "article",
+            "id": i,
+            "title": "Result number %s" % i,
+            "description": "A short description of the result",
+            "input_message_content": {
+                "message_text": "This is the content of the result %s" % i,
+                "disable_web_page_preview": False,
+            },
+        } for i in range(results)],
+    }
+
+
+def encode_old(params):
+    """Encode the request as botogram used to do"""
+    params = {key: json.dumps(value) if isinstance(value, (dict, list))
+              else value for key, value in params.items()}
+    return requests.Request("GET", URL, params=params).prepare()
+
+
+def encode_new(params):
+    """Encode the request as botogram does now"""
+    return requests.Request("POST", URL, json=params).prepare()
+
+
+def bench(name, params, number=2000):
+    old = min(timeit.repeat(lambda: encode_old(params), number=number,
+                            repeat=5)) / number
+    new = min(timeit.repeat(lambda: encode_new(params), number=number,
+                            repeat=5)) / number
+
+    old_size = len(encode_old(params).url)
+    new_size = len(encode_new(params).body)
+
+    print("%s:" % name)
+    print("  GET query string: %7.1f us, %6d bytes of URL" % (
+        old * 1e6, old_size))
+    print("  POST JSON body:   %7.1f us, %6d bytes of body" % (
+        new * 1e6, new_size))
+    print("  speedup:          %7.2fx" % (old / new))
+
+
+if __name__ == "__main__":
+    bench("Keyboard with 8x5 buttons", keyboard_params())
+    bench("Page of 50 inline results", inline_params())
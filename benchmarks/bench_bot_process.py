@@ -0,0 +1,69 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+"""
+Benchmark processing updates with Bot.process, without the runner
+
+This compares freezing the bot for each update, as Bot.process used to do,
+with reusing the frozen instance until the bot changes, for a small bot and
+for a bot with 80 commands, 300 keywords and 20 regexes.
+
+Run it with: python3 benchmarks/bench_bot_process.py
+"""
+
+import timeit
+
+import botogram.bot
+
+from bench_message_hooks import FakeAPI, create_bot, hook, update
+
+
+def small_bot():
+    """Create a bot with a few commands"""
+    bot = botogram.bot.Bot(FakeAPI())
+    for i in range(5):
+        bot.command("command%s" % i)(hook)
+    return bot
+
+
+def bench(name, bot, text, number=200):
+    message = update(text)
+
+    def old():
+        bot.freeze().process(message)
+
+    def new():
+        bot.process(message)
+
+    old_time = min(timeit.repeat(old, number=number, repeat=5)) / number
+    new_time = min(timeit.repeat(new, number=number, repeat=5)) / number
+
+    print("%-28s %9.0f/s %9.0f/s %7.1fx" % (
+        name, 1 / old_time, 1 / new_time, old_time / new_time))
+
+
+if __name__ == "__main__":
+    print("%-28s %11s %11s %8s" % ("updates per second", "old", "new",
+                                   "speedup"))
+    bot = small_bot()
+    bench("small bot, command", bot, "/command4 some args")
+    bench("small bot, message", bot, "just a normal message")
+    bot = create_bot()
+    bench("big bot, command", bot, "/command79 some args")
+    bench("big bot, message", bot, "just a normal message")
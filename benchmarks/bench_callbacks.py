@@ -0,0 +1,128 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the signing of the callbacks in large keyboards
+
+This compares the old signing (the secret key of the bot derived again and
+a new HMAC keyed for every button) with the new one (the keyed HMAC cached
+for the bot and copied for every button of the keyboard), serializing
+keyboards of growing size and parsing the data of a callback query.
+
+Run it with: python3 benchmarks/bench_callbacks.py
+"""
+
+import hmac
+import timeit
+
+import botogram.bot
+import botogram.callbacks
+import botogram.crypto
+import botogram.objects
+from botogram.context import Context
+
+
+class FakeAPI:
+    """API connection returning the bot itself to getMe"""
+
+    token = "123456789:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi"
+
+    def call(self, method, params=None, expect=None):
+        return expect({"id": 1, "first_name": "bench", "username": "bench"})
+
+
+class FakeHook:
+    """Hook of the main component"""
+
+    class component:
+        component_name = ""
+
+
+class OldSigner(botogram.callbacks.CallbackSigner):
+    """Sign the callbacks as botogram used to do"""
+
+    def __init__(self, bot, chat):
+        super().__init__(bot, chat)
+        self._bot = bot
+
+    def signature(self, name, data):
+        key = botogram.crypto.generate_secret_key(self._bot)
+        mac = hmac.new(key, digestmod=botogram.crypto.DIGEST)
+        mac.update(name + b'\0' + self._chat_id + b'\0' + data)
+        return mac.digest()
+
+
+def keyboard(buttons):
+    keyboard = botogram.callbacks.Buttons()
+    for i in range(buttons):
+        keyboard[i].callback("Button %s" % i, "callback", str(i))
+    return keyboard
+
+
+def serialize(signer_class, keyboard, chat):
+    """Serialize a keyboard with a signer"""
+    botogram.callbacks.CallbackSigner = signer_class
+    try:
+        return keyboard._serialize_attachment(chat)
+    finally:
+        botogram.callbacks.CallbackSigner = NewSigner
+
+
+def parse(signer_class, bot, chat, raw):
+    """Parse the data of a callback query with a signer"""
+    botogram.callbacks.CallbackSigner = signer_class
+    try:
+        return botogram.callbacks.parse_callback_data(bot, chat, raw)
+    finally:
+        botogram.callbacks.CallbackSigner = NewSigner
+
+
+NewSigner = botogram.callbacks.CallbackSigner
+
+
+def bench(name, old, new, number=200):
+    old_time = min(timeit.repeat(old, number=number, repeat=5)) / number
+    new_time = min(timeit.repeat(new, number=number, repeat=5)) / number
+
+    print("%-24s %9.1f us %9.1f us %7.1fx" % (
+        name, old_time * 1e6, new_time * 1e6, old_time / new_time))
+
+
+if __name__ == "__main__":
+    bot = botogram.bot.Bot(FakeAPI()).freeze()
+    chat = botogram.objects.Chat({"id": -1001234567890, "type": "group"})
+
+    print("%-24s %12s %12s %8s" % ("", "old", "new", "speedup"))
+    with Context(bot, FakeHook, None):
+        # The keyboards must be the same
+        assert serialize(OldSigner, keyboard(5), chat) == \
+            serialize(NewSigner, keyboard(5), chat)
+
+        for buttons in 10, 50, 100:
+            markup = keyboard(buttons)
+            bench("keyboard of %s buttons" % buttons,
+                  lambda: serialize(OldSigner, markup, chat),
+                  lambda: serialize(NewSigner, markup, chat))
+
+        raw = serialize(NewSigner, keyboard(1), chat)
+        raw = raw["inline_keyboard"][0][0]["callback_data"]
+
+    bench("callback query", lambda: parse(OldSigner, bot, chat, raw),
+          lambda: parse(NewSigner, bot, chat, raw), number=20000)
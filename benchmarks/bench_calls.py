@@ -0,0 +1,99 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the calls to the hooks functions
+
+This compares the old botogram.utils.call, which inspected the signature of
+the function on every call, with the new one, which resolves the signature
+once into a cached call plan, both called directly and through the frozen
+bot like the hooks do.
+
+Run it with: python3 benchmarks/bench_calls.py
+"""
+
+import inspect
+import timeit
+
+import botogram.bot
+import botogram.utils
+
+
+def old_call(func, **available):
+    """Call a function as botogram used to do"""
+    if hasattr(func, "_botogram_original_signature"):
+        signature = func._botogram_original_signature
+    else:
+        signature = inspect.signature(func)
+
+    kwargs = {}
+
+    for parameter in signature.parameters.values():
+        if parameter.name not in available:
+            if parameter.default is not inspect.Parameter.empty:
+                continue
+
+            raise TypeError("botogram doesn't know what to provide for %s"
+                            % parameter.name)
+
+        arg = available[parameter.name]
+        if hasattr(arg, "_botogram_call_lazy_argument"):
+            arg = arg.load()
+
+        kwargs[parameter.name] = arg
+
+    return func(**kwargs)
+
+
+class FakeAPI:
+    """API connection returning the bot itself to getMe"""
+
+    def call(self, method, params=None, expect=None):
+        return expect({"id": 1, "first_name": "bench", "username": "bench"})
+
+
+def hook(chat, message, args, shared=None):
+    pass
+
+
+def bench(name, old, new, number=20000):
+    old_time = min(timeit.repeat(old, number=number, repeat=5)) / number
+    new_time = min(timeit.repeat(new, number=number, repeat=5)) / number
+
+    print("%-24s %8.2f us %8.2f us %7.1fx" % (
+        name, old_time * 1e6, new_time * 1e6, old_time / new_time))
+
+
+if __name__ == "__main__":
+    frozen = botogram.bot.Bot(FakeAPI()).freeze()
+    available = {"chat": 1, "message": 2, "args": [], "bot": frozen}
+
+    def old_bot_call():
+        # This is what FrozenBot._call used to do
+        lazy = botogram.utils.CallLazyArgument(lambda: None)
+        old_call(hook, shared=lazy, **available)
+
+    def new_bot_call():
+        frozen._call(hook, "component", chat=1, message=2, args=[])
+
+    print("%-24s %11s %11s %8s" % ("", "old", "new", "speedup"))
+    bench("utils.call", lambda: old_call(hook, **available),
+          lambda: botogram.utils.call(hook, **available))
+    bench("FrozenBot._call", old_bot_call, new_bot_call)
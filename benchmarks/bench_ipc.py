@@ -0,0 +1,171 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the IPC transport of the runner
+
+This compares the old transport (TCP on localhost, default pickle protocol,
+reads in 4096 bytes chunks and two writes for each packet) with the new one
+(Unix sockets, highest pickle protocol, reads in a reusable buffer and a
+single vectored write), measuring the round trips of a small command like
+jobs.get and the overhead of each update sent with jobs.bulk_put.
+
+Run it with: python3 benchmarks/bench_ipc.py
+"""
+
+import multiprocessing
+import os
+import pickle
+import socket
+import struct
+import tempfile
+import time
+
+import botogram.objects
+from botogram.runner import ipc
+from botogram.runner import jobs
+
+
+def old_read_packet(conn):
+    """Read a packet as botogram used to do"""
+    def read(length):
+        chunks = []
+        while length > 0:
+            chunk = conn.recv(min(length, 4096))
+            if not chunk:
+                raise EOFError("Broken socket!")
+            chunks.append(chunk)
+            length -= len(chunk)
+        return b"".join(chunks)
+
+    size = struct.unpack("I", read(4))[0]
+    return pickle.loads(read(size))
+
+
+def old_write_packet(conn, data):
+    """Write a packet as botogram used to do"""
+    pickled = pickle.dumps(data)
+    conn.sendall(struct.pack("I", len(pickled)))
+    conn.sendall(pickled)
+
+
+TRANSPORTS = {
+    "old": (old_read_packet, old_write_packet),
+    "new": (ipc.read_packet, ipc.write_packet),
+    "new-tcp": (ipc.read_packet, ipc.write_packet),
+}
+
+
+def echo_server(listener, name):
+    """Reply to each packet with the packet itself"""
+    read, write = TRANSPORTS[name]
+    conn, _ = listener.accept()
+    if name == "new-tcp":
+        ipc._set_nodelay(conn)
+    try:
+        while True:
+            write(conn, read(conn))
+    except EOFError:
+        pass
+
+
+def connect(name):
+    """Start an echo server and connect to it"""
+    if name != "new":
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(("localhost", 0))
+        address = listener.getsockname()
+    else:
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = os.path.join(tempfile.mkdtemp(), "bench.sock")
+        listener.bind(address)
+    listener.listen(1)
+
+    process = multiprocessing.Process(target=echo_server,
+                                      args=(listener, name))
+    process.start()
+
+    conn = socket.socket(listener.family, socket.SOCK_STREAM)
+    conn.connect(address)
+    if name == "new-tcp":
+        ipc._set_nodelay(conn)
+    listener.close()
+    return process, conn
+
+
+def sample_job(update_id):
+    """A job like the ones sent by the updaters"""
+    update = botogram.objects.Update({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "from": {"id": 123, "first_name": "Test", "username": "test"},
+            "chat": {"id": 123, "type": "private", "first_name": "Test"},
+            "date": 1500000000,
+            "text": "Hello world, this is a sample message",
+        },
+    })
+    return jobs.Job("bot", jobs.process_update, {"update": update})
+
+
+def bench(name, duration=2):
+    read, write = TRANSPORTS[name]
+    process, conn = connect(name)
+
+    # Round trips of a small command
+    packet = {"command": "jobs.get", "data": 0}
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        write(conn, packet)
+        read(conn)
+        count += 1
+    round_trips = count / (time.perf_counter() - start)
+
+    # Overhead of each update sent in a batch
+    packet = {"command": "jobs.bulk_put",
+              "data": [sample_job(i) for i in range(100)]}
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        write(conn, packet)
+        read(conn)
+        count += 100
+    per_update = (time.perf_counter() - start) / count
+
+    conn.close()
+    process.join()
+    return round_trips, per_update
+
+
+if __name__ == "__main__":
+    results = {name: bench(name) for name in TRANSPORTS}
+
+    for name, description in (("old", "TCP, old framing"),
+                              ("new-tcp", "TCP, new framing"),
+                              ("new", "Unix socket, new framing")):
+        round_trips, per_update = results[name]
+        print("%s:" % description)
+        print("  small command: %8.0f round trips/s" % round_trips)
+        print("  bulk_put:      %8.1f us per update" % (per_update * 1e6))
+
+    print("speedup: %.2fx round trips, %.2fx per update" % (
+        results["new"][0] / results["old"][0],
+        results["old"][1] / results["new"][1]))
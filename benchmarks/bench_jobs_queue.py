@@ -0,0 +1,140 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the jobs queue of the runner
+
+When a worker is busy, the inline queries assigned to it pile up in the
+queue, and the other workers need to skip them to find their jobs. This
+compares the old queue (a single deque, scanned and deleted from by index)
+with the new one (a shared FIFO plus a FIFO for each worker), measuring the
+time each worker spends to get a job while it drains a queue of growing
+size, half of which is assigned to a busy worker.
+
+Run it with: python3 benchmarks/bench_jobs_queue.py
+"""
+
+import collections
+import time
+
+from botogram.runner import jobs
+
+
+class OldJobsCommands:
+    """The jobs queue as botogram used to implement it"""
+
+    def __init__(self):
+        self.queue = collections.deque()
+        self._seen_workers = [0, 1]
+
+    def put(self, job):
+        self.queue.appendleft(job)
+
+    def get(self, worker_id):
+        for job_id in range(len(self.queue)):
+            job = self.queue[job_id]
+            if jobs._is_inline_update(job):
+                assigned = jobs._inline_assign_worker(
+                    job.metadata["update"]["inline_query"],
+                    len(self._seen_workers))
+                if worker_id != assigned:
+                    continue
+            del self.queue[job_id]
+            return job
+
+
+class NewJobsCommands:
+    """Adapter of the new jobs queue to the old interface"""
+
+    def __init__(self):
+        self.commands = jobs.JobsCommands(workers=2)
+        self.commands._seen_workers = {0, 1}
+        self.result = None
+
+    def _reply(self, result):
+        self.result = result
+
+    def put(self, job):
+        self.commands._put(job)
+
+    def get(self, worker_id):
+        self.commands.get((worker_id, 1, []), self._reply)
+        return self.result[0]
+
+
+def inline_job(update_id):
+    """An inline query assigned to the second worker"""
+    sender = update_id * 2
+    while True:
+        update = {
+            "update_id": update_id,
+            "inline_query": {
+                "id": str(update_id),
+                "from": {"id": sender, "first_name": "Test"},
+                "query": "query",
+                "offset": "",
+            },
+        }
+        if jobs._inline_assign_worker(update["inline_query"], 2) == 1:
+            return jobs.Job("bot", None, {"update": update})
+        sender += 1
+
+
+def message_job(update_id):
+    """A message any worker can process"""
+    update = {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "chat": {"id": update_id, "type": "private"},
+            "date": 0,
+            "text": "Hello world",
+        },
+    }
+    return jobs.Job("bot", None, {"update": update})
+
+
+def bench(queue_class, size, repeat=3):
+    """Drain the messages from a queue full of busy inline queries"""
+    results = []
+    for _ in range(repeat):
+        queue = queue_class()
+        for update_id in range(size):
+            if update_id % 2:
+                queue.put(inline_job(update_id))
+            else:
+                queue.put(message_job(update_id))
+
+        start = time.perf_counter()
+        for _ in range(size // 2):
+            queue.get(0)
+        results.append((time.perf_counter() - start) / (size // 2))
+
+    return min(results)
+
+
+if __name__ == "__main__":
+    print("queued jobs   old queue     new queue     speedup")
+    for size in 100, 1000, 5000, 10000:
+        # The old queue is too slow to run the big sizes multiple times
+        old = bench(OldJobsCommands, size, 3 if size <= 1000 else 1)
+        new = bench(NewJobsCommands, size)
+        print("%11d   %7.2f us    %7.2f us    %7.1fx" % (
+            size, old * 1e6, new * 1e6, old / new))
@@ -0,0 +1,108 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the processing of messages by bots with many hooks
+
+This compares the old messages chain, where each command and text matching
+hook checks the message by itself, with the new one, where commands are
+looked up by name and the text matching hooks are indexed, for a bot with
+80 commands, 300 keywords and 20 regexes.
+
+Run it with: python3 benchmarks/bench_message_hooks.py
+"""
+
+import timeit
+
+import botogram.bot
+import botogram.components
+import botogram.messages
+import botogram.objects
+
+
+class FakeAPI:
+    """API connection returning the bot itself to getMe"""
+
+    def call(self, method, params=None, expect=None):
+        return expect({"id": 1, "first_name": "bench", "username": "bench"})
+
+
+def hook():
+    pass
+
+
+def create_bot(commands=80, keywords=300, regexes=20):
+    """Create a bot with many message hooks"""
+    bot = botogram.bot.Bot(FakeAPI())
+    for i in range(commands):
+        bot.command("command%s" % i)(hook)
+    for i in range(keywords):
+        if i % 2:
+            bot.message_equals("keyword %s" % i)(hook)
+        else:
+            bot.message_contains("keyword%s" % i)(hook)
+    for i in range(regexes):
+        bot.message_matches(r"regex%s-\d+" % i)(hook)
+
+    return bot
+
+
+def update(text):
+    return botogram.objects.Update({
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "chat": {"id": 1, "type": "private", "first_name": "test"},
+            "from": {"id": 1, "first_name": "test"},
+            "date": 0,
+            "text": text,
+        },
+    })
+
+
+def bench(name, bot, text, number=200):
+    frozen = bot.freeze()
+    old_chains = {"messages": botogram.components.merge_chains(
+        bot._main_component, *bot._components,
+    )["messages"]}
+    message = update(text)
+
+    def old():
+        botogram.messages.process_message(frozen, old_chains, message)
+
+    def new():
+        botogram.messages.process_message(frozen, frozen._chains, message)
+
+    old_time = min(timeit.repeat(old, number=number, repeat=5)) / number
+    new_time = min(timeit.repeat(new, number=number, repeat=5)) / number
+
+    print("%-28s %9.1f us %9.1f us %7.1fx" % (
+        name, old_time * 1e6, new_time * 1e6, old_time / new_time))
+
+
+if __name__ == "__main__":
+    bot = create_bot()
+
+    print("%-28s %12s %12s %8s" % ("message", "old", "new", "speedup"))
+    bench("last command", bot, "/command79 some args")
+    bench("command for another bot", bot, "/command1@other_bot")
+    bench("keyword", bot, "this contains keyword298 too")
+    bench("regex", bot, "this matches regex19-42")
+    bench("no matching hooks", bot, "just a normal message " * 5)
@@ -0,0 +1,123 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the lazy parsing of the updates
+
+This compares the default objects, which parse the whole update when it's
+received, with the lazy ones (enabled with the BOTOGRAM_LAZY_OBJECTS
+environment variable), which parse the nested objects only when they're
+accessed. Each update is parsed and processed like a hook reading only the
+text of the message would, measuring the time per update and the memory
+allocated. Each mode runs in a separate process, since the mode is chosen
+when botogram is imported.
+
+Run it with: python3 benchmarks/bench_objects_lazy.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+
+MODES = [
+    ("default", {}),
+    ("lazy", {"BOTOGRAM_LAZY_OBJECTS": "1"}),
+    ("lazy and compact", {"BOTOGRAM_LAZY_OBJECTS": "1",
+                          "BOTOGRAM_COMPACT_OBJECTS": "1"}),
+]
+
+
+def process(data):
+    """Parse and process updates like a simple bot would"""
+    import botogram.objects
+
+    parsed = botogram.objects.Updates(data)
+    parsed.set_api(None)
+
+    texts = []
+    for update in parsed:
+        for kind in update.optional:
+            message = getattr(update, kind)
+            if message is None:
+                continue
+            if kind in ("message", "edited_message"):
+                texts.append(message.text)
+            break
+    return parsed, texts
+
+
+def measure(count):
+    """Measure the time and memory needed to process count updates"""
+    from bench_objects_parsing import updates
+
+    data = updates(count)
+    process(data)  # Generate the parsers before measuring
+
+    number = max(10, 1000 // count)
+    seconds = min(timeit.repeat(lambda: process(data), number=number,
+                                repeat=7)) / number
+
+    tracemalloc.start()
+    parsed = process(data)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+
+    return {"time": seconds / count, "size": size / count,
+            "peak": peak / count}
+
+
+def run(env, count):
+    """Measure in a new process"""
+    full_env = dict(os.environ)
+    full_env.pop("BOTOGRAM_LAZY_OBJECTS", None)
+    full_env.pop("BOTOGRAM_COMPACT_OBJECTS", None)
+    full_env.update(env)
+
+    # Make sure botogram and the other benchmarks can be imported
+    here = os.path.dirname(os.path.abspath(__file__))
+    full_env["PYTHONPATH"] = os.pathsep.join(
+        [here, os.path.dirname(here), full_env.get("PYTHONPATH", "")]
+    )
+
+    output = subprocess.check_output([
+        sys.executable, __file__, "--measure", str(count),
+    ], env=full_env)
+    return json.loads(output.decode("utf-8"))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        print(json.dumps(measure(int(sys.argv[2]))))
+        sys.exit()
+
+    count = 100
+    print("Per update, processing batches of %s updates:" % count)
+    print("%-20s %12s %16s %16s" % ("", "time", "retained memory",
+                                    "peak memory"))
+    for name, env in MODES:
+        result = run(env, count)
+        print("%-20s %9.1f us %12.1f KiB %12.1f KiB" % (
+            name, result["time"] * 1e6, result["size"] / 1024,
+            result["peak"] / 1024))
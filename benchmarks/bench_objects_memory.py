@@ -0,0 +1,88 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the memory used by the parsed updates
+
+This compares the memory allocated for the object graph of typical updates
+with the default objects (fields stored in a __dict__) and with the compact
+ones (fields stored in __slots__, enabled with the BOTOGRAM_COMPACT_OBJECTS
+environment variable). Each mode runs in a separate process, since the mode
+is chosen when botogram is imported.
+
+Run it with: python3 benchmarks/bench_objects_memory.py
+"""
+
+import os
+import subprocess
+import sys
+import tracemalloc
+
+
+def measure(count):
+    """Measure the memory used by count parsed updates"""
+    import botogram.objects
+    from bench_objects_parsing import updates
+
+    data = updates(count)
+
+    # Don't measure the parsers generated the first time
+    botogram.objects.Updates(updates(4)).set_api(None)
+
+    tracemalloc.start()
+    parsed = botogram.objects.Updates(data)
+    parsed.set_api(None)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size
+
+
+def run(compact, count):
+    """Measure the memory in a new process"""
+    env = dict(os.environ)
+    env.pop("BOTOGRAM_COMPACT_OBJECTS", None)
+    if compact:
+        env["BOTOGRAM_COMPACT_OBJECTS"] = "1"
+
+    # Make sure botogram and the other benchmarks can be imported
+    here = os.path.dirname(os.path.abspath(__file__))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [here, os.path.dirname(here), env.get("PYTHONPATH", "")]
+    )
+
+    output = subprocess.check_output([
+        sys.executable, __file__, "--measure", str(count),
+    ], env=env)
+    return int(output)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        print(measure(int(sys.argv[2])))
+        sys.exit()
+
+    print("%-24s %14s %14s %8s" % ("", "default", "compact", "saved"))
+    for count in 1, 100, 1000:
+        default = run(False, count)
+        compact = run(True, count)
+        print("%-24s %11.1f KiB %11.1f KiB %7.1f%%" % (
+            "%s updates" % count, default / 1024, compact / 1024,
+            (1 - compact / default) * 100))
@@ -0,0 +1,153 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmark the parsing of the updates received from Telegram
+
+This compares the old BaseObject constructor and set_api (looping over the
+fields tables and calling setattr and getattr for each field) with the new
+ones (functions generated for each class, with the fields unrolled),
+parsing batches of realistic updates and setting their API.
+
+Run it with: python3 benchmarks/bench_objects_parsing.py
+"""
+
+import copy
+import timeit
+
+import botogram.objects
+from botogram.objects import base
+
+
+def old_init(self, data, api=None):
+    """Populate an object as botogram used to do"""
+    if not isinstance(data, dict):
+        raise ValueError("A dict must be provided")
+
+    for group, required in ((self.required, True), (self.optional, False)):
+        for key, field_type in group.items():
+            if key not in data and required:
+                raise ValueError("The key %s must be present" % key)
+
+            if field_type is base._itself:
+                field_type = self.__class__
+
+            new_key = key
+            if key in self.replace_keys:
+                new_key = self.replace_keys[key]
+
+            if key not in data:
+                setattr(self, new_key, None)
+                continue
+
+            setattr(self, new_key, field_type(data[key]))
+
+    if api is not None:
+        self.set_api(api)
+
+
+def old_set_api(self, api):
+    """Set the API of an object as botogram used to do"""
+    self._api = api
+
+    for key in list(self.required.keys()) + list(self.optional.keys()):
+        if key in self.replace_keys:
+            key = self.replace_keys[key]
+
+        value = getattr(self, key)
+        if value is None:
+            continue
+
+        if hasattr(value, "set_api"):
+            value.set_api(api)
+
+
+USER = {"id": 12345678, "is_bot": False, "first_name": "John",
+        "last_name": "Doe", "username": "johndoe", "language_code": "en"}
+GROUP = {"id": -1001234567890, "type": "supergroup", "title": "A group",
+         "username": "agroup"}
+
+MESSAGE = {
+    "message_id": 1234, "from": USER, "chat": GROUP, "date": 1570000000,
+    "text": "Hello @someone, look at https://example.com #botogram",
+    "entities": [
+        {"type": "mention", "offset": 6, "length": 8},
+        {"type": "url", "offset": 24, "length": 19},
+        {"type": "hashtag", "offset": 44, "length": 9},
+    ],
+    "reply_to_message": {
+        "message_id": 1233, "from": USER, "chat": GROUP, "date": 1569999990,
+        "text": "A previous message",
+    },
+}
+PHOTO = {
+    "message_id": 1235, "from": USER, "chat": GROUP, "date": 1570000001,
+    "caption": "A photo",
+    "photo": [
+        {"file_id": "AgADBAAD%s" % i, "file_size": 1000 * i,
+         "width": 90 * i, "height": 60 * i} for i in range(1, 5)
+    ],
+}
+CALLBACK = {
+    "id": "4382bfdwdsb323b2d9", "from": USER, "chat_instance": "-123456",
+    "data": "bmFtZXNwYWNlOmNhbGxiYWNrOg==data", "message": MESSAGE,
+}
+
+
+def updates(count):
+    """Get a batch of realistic updates"""
+    result = []
+    for i in range(count):
+        kind, content = [
+            ("message", MESSAGE), ("message", PHOTO),
+            ("edited_message", MESSAGE), ("callback_query", CALLBACK),
+        ][i % 4]
+        result.append({"update_id": i, kind: copy.deepcopy(content)})
+    return result
+
+
+def parse(data):
+    parsed = botogram.objects.Updates(data)
+    parsed.set_api(None)
+    return parsed
+
+
+def bench(name, data):
+    number = max(10, 1000 // len(data))
+    new_init, new_set_api = base.BaseObject.__init__, base.BaseObject.set_api
+    new_time = min(timeit.repeat(lambda: parse(data), number=number,
+                                 repeat=7)) / number
+
+    base.BaseObject.__init__, base.BaseObject.set_api = old_init, old_set_api
+    try:
+        old_time = min(timeit.repeat(lambda: parse(data), number=number,
+                                     repeat=7)) / number
+    finally:
+        base.BaseObject.__init__ = new_init
+        base.BaseObject.set_api = new_set_api
+
+    print("%-24s %9.2f ms %9.2f ms %7.2fx" % (
+        name, old_time * 1e3, new_time * 1e3, old_time / new_time))
+
+
+if __name__ == "__main__":
+    print("%-24s %12s %12s %8s" % ("", "old", "new", "speedup"))
+    for count in 1, 10, 100:
+        bench("batch of %s updates" % count, updates(count))
@@ -0,0 +1,101 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+"""
+Benchmark sending the updates from the updater to the workers
+
+This compares sending the parsed updates (parsing them in the updater,
+removing their API, pickling the whole objects, and restoring the API in the
+worker) with sending the raw JSON received from Telegram, parsed only by the
+workers. The time spent by the updater, which is a single process for each
+bot, is measured separately.
+
+Run it with: python3 benchmarks/bench_raw_updates.py
+"""
+
+import pickle
+import timeit
+
+import botogram.objects
+from botogram.runner import jobs
+
+from bench_objects_parsing import updates
+
+
+API = object()
+
+
+def parsed_updater(data):
+    """Prepare the jobs as the updater used to do"""
+    result = []
+    for update in botogram.objects.Updates(data):
+        update.set_api(None)
+        result.append(jobs.Job("bot", None, {"update": update, "ack": True}))
+    return pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+
+
+def parsed_worker(payload):
+    """Restore the jobs as the workers used to do"""
+    for job in pickle.loads(payload):
+        job.metadata["update"].set_api(API)
+
+
+def raw_updater(data):
+    """Prepare the jobs with the raw updates"""
+    result = []
+    for update in data:
+        result.append(jobs.Job("bot", None, {"update": update, "ack": True}))
+    return pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+
+
+def raw_worker(payload):
+    """Parse the raw updates in the workers"""
+    for job in pickle.loads(payload):
+        botogram.objects.Update(job.metadata["update"], API)
+
+
+def measure(func, arg, number):
+    return min(timeit.repeat(lambda: func(arg), number=number,
+                             repeat=7)) / number
+
+
+def bench(count):
+    data = updates(count)
+    number = max(10, 1000 // count)
+
+    old_updater = measure(parsed_updater, data, number)
+    new_updater = measure(raw_updater, data, number)
+    old_worker = measure(parsed_worker, parsed_updater(data), number)
+    new_worker = measure(raw_worker, raw_updater(data), number)
+
+    for name, old, new in ("updater", old_updater, new_updater), \
+            ("updater + worker", old_updater + old_worker,
+             new_updater + new_worker):
+        print("%-16s %4s updates %9.2f ms %9.2f ms %7.2fx" % (
+            name, count, old * 1e3, new * 1e3, old / new))
+
+    print("%-16s %4s updates %9s B  %9s B" % (
+        "pickled size", count, len(parsed_updater(data)),
+        len(raw_updater(data))))
+
+
+if __name__ == "__main__":
+    print("%-29s %12s %12s %8s" % ("", "parsed", "raw", "speedup"))
+    for count in 1, 10, 100:
+        bench(count)
@@ -0,0 +1,105 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+"""
+Benchmark the drivers of the shared memory used by the runner
+
+This compares the MultiprocessingDriver, where each read and write of the
+shared memory is a round trip to the manager process, with the cached driver
+in both its consistency levels, where each worker reads its own copy of the
+memory. Each simulated hook gets the memory (as botogram does for each hook
+with the shared argument), reads some keys from it and sometimes changes one
+of them.
+
+Run it with: python3 benchmarks/bench_shared_memory.py
+"""
+
+import multiprocessing
+import time
+
+from botogram.runner import ipc
+from botogram.runner import processes
+from botogram.runner import shared
+
+
+HOOKS = 2000
+READS = 10
+
+# One hook every WRITE_EVERY changes the memory
+WRITE_EVERY = 10
+
+DRIVERS = {
+    "manager": shared.MultiprocessingDriver,
+    "read-your-writes":
+        lambda: shared.CachedMultiprocessingDriver("read-your-writes"),
+    "eventual": lambda: shared.CachedMultiprocessingDriver("eventual"),
+}
+
+
+def hooks(driver, memory_id):
+    """Simulate a bunch of hooks using the shared memory"""
+    start = time.perf_counter()
+    for i in range(HOOKS):
+        memory, __ = driver.get(memory_id)
+        for key in range(READS):
+            memory.get(key)
+        if i % WRITE_EVERY == 0:
+            memory[i % READS] = i
+    return time.perf_counter() - start
+
+
+def main():
+    server = ipc.IPCServer()
+    ipc_process = processes.IPCProcess(None, server, {})
+    ipc_process.start()
+
+    client = None
+    while client is None:
+        try:
+            client = ipc.IPCClient(server.address, server.auth_key)
+        except ConnectionRefusedError:
+            time.sleep(0.1)
+    multiprocessing.current_process().ipc = client
+
+    print("%d hooks, each one reading %d keys, one every %d changing a key"
+          % (HOOKS, READS, WRITE_EVERY))
+
+    results = {}
+    for name, factory in DRIVERS.items():
+        driver = factory()
+        memory, __ = driver.get(name)
+        memory.update({key: None for key in range(READS)})
+
+        results[name] = hooks(driver, name)
+        print("%-17s %8.2f ms  (%6.1f us per hook)" % (
+            name, results[name] * 1000, results[name] / HOOKS * 1000000,
+        ))
+
+    for name in DRIVERS:
+        if name != "manager":
+            print("%s is %.1fx faster than the manager" % (
+                name, results["manager"] / results[name],
+            ))
+
+    client.command("__stop__", server.stop_key)
+    ipc_process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+"""
+Benchmark the startup of botogram
+
+This measures how much importing botogram takes with python -X importtime,
+checking it stays within IMPORT_BUDGET and that the dependencies imported
+only when needed aren't imported. It also compares loading the translations
+from disk each time, as botogram used to do, with the cached ones, both
+alone and when freezing a bot.
+
+Run it with: python3 benchmarks/bench_startup.py
+"""
+
+import gettext
+import os
+import subprocess
+import sys
+import timeit
+
+import botogram.bot
+import botogram.utils
+
+from bench_message_hooks import FakeAPI
+
+
+# Maximum time importing botogram should take, in seconds
+IMPORT_BUDGET = 0.25
+
+# Those must not be imported by "import botogram"
+LAZY_MODULES = ("requests", "pkg_resources")
+
+
+def old_get_language(lang):
+    """Load the translations as botogram used to do"""
+    import pkg_resources
+    path = pkg_resources.resource_filename("botogram", "i18n/%s.mo" % lang)
+    if not os.path.exists(path):
+        raise ValueError('Language "%s" is not supported by botogram' % lang)
+
+    with open(path, "rb") as f:
+        gt = gettext.GNUTranslations(f)
+
+    return gt
+
+
+def import_times(code):
+    """Run some code in a new interpreter, and get the import times"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+        universal_newlines=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times, result.stdout.split()
+
+
+def bench_import(repeat=5):
+    # Modules imported by the interpreter itself are ignored
+    interpreter, _ = import_times("pass")
+
+    code = "import botogram, sys; print(*[m for m in %r if m in sys.modules])"
+    runs = [import_times(code % (LAZY_MODULES,)) for _ in range(repeat)]
+    times, imported = min(runs, key=lambda run: run[0]["botogram"])
+    total = times["botogram"]
+
+    print("import botogram: %.1f ms (budget %.1f ms): %s" % (
+        total * 1e3, IMPORT_BUDGET * 1e3,
+        "OK" if total <= IMPORT_BUDGET else "OVER BUDGET",
+    ))
+    print("lazy modules imported: %s" % (", ".join(imported) or "none"))
+    print("slowest modules:")
+    slowest = sorted((time, name) for name, time in times.items()
+                     if name not in interpreter and name != "botogram")
+    for time, name in reversed(slowest[-8:]):
+        print("    %-32s %7.1f ms" % (name, time * 1e3))
+
+    return total <= IMPORT_BUDGET and not imported
+
+
+def bench(name, func, number=200):
+    new_get_language = botogram.utils.get_language
+    new_time = min(timeit.repeat(func, number=number, repeat=5)) / number
+
+    botogram.utils.get_language = old_get_language
+    try:
+        old_time = min(timeit.repeat(func, number=number, repeat=5)) / number
+    finally:
+        botogram.utils.get_language = new_get_language
+
+    print("%-28s %9.1f us %9.1f us %7.1fx" % (
+        name, old_time * 1e6, new_time * 1e6, old_time / new_time))
+
+
+if __name__ == "__main__":
+    ok = bench_import()
+
+    bot = botogram.bot.Bot(FakeAPI())
+    print()
+    print("%-28s %12s %12s %8s" % ("", "old", "new", "speedup"))
+    bench("load the translations", lambda: botogram.utils.get_language("en"))
+    bench("freeze a bot", bot.freeze)
+
+    sys.exit(0 if ok else 1)
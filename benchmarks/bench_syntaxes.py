@@ -0,0 +1,101 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+"""
+Benchmark the detection of the syntax of the messages
+
+This compares the old detection (regexes with nested wildcards matched on the
+whole message) with the new one (a single pass over the delimiters), with
+messages from 10 characters to the 4096 characters limit. The time per
+character should stay flat for the new detection.
+
+Run it with: python3 benchmarks/bench_syntaxes.py
+"""
+
+import re
+import timeit
+
+from botogram import syntaxes
+
+
+_old_markdown_re = re.compile(r".*("
+                              r"\*(.*)\*|"
+                              r"_(.*)_|"
+                              r"\[(.*)\]\((.*)\)|"
+                              r"`(.*)`|"
+                              r"```(.*)```"
+                              r").*")
+
+_old_html_re = re.compile(r".*("
+                          r"<b>(.*)<\/b>|"
+                          r"<strong>(.*)<\/strong>|"
+                          r"<i>(.*)<\/i>|"
+                          r"<em>(.*)<\/em>|"
+                          r"<a\shref=\"(.*)\">(.*)<\/a>|"
+                          r"<code>(.*)<\/code>|"
+                          r"<pre>(.*)<\/pre>"
+                          r").*")
+
+_old_email_re = re.compile(r"[a-zA-Z0-9_\.\+\-]+\@[a-zA-Z0-9_\.\-]+\."
+                           r"[a-zA-Z]+")
+_old_url_re = re.compile(r"https?://(-\.)?([^\s/?\.#]+\.?)+(/[^\s]*)?")
+
+
+def old_guess_syntax(message):
+    """Guess the syntax of a message as botogram used to do"""
+    stripped = _old_email_re.sub("", _old_url_re.sub("", message))
+    if _old_markdown_re.match(stripped.replace("\n", "")):
+        return "Markdown"
+    elif _old_html_re.match(message.replace("\n", "")):
+        return "HTML"
+
+
+def new_guess_syntax(message):
+    return syntaxes.guess_syntax(message, None)
+
+
+MESSAGES = {
+    "plain text": "Hello everyone, see you at 10 at the usual place!\n",
+    "html": "<b>Hello</b> everyone, <i>see you</i> at 10 o'clock!\n",
+    "long words": "a" * 100 + " ",
+    "broken links": "[a](",
+}
+
+
+def bench(kind, size):
+    message = (MESSAGES[kind] * (size // len(MESSAGES[kind]) + 1))[:size]
+    assert old_guess_syntax(message) == new_guess_syntax(message)
+
+    number = max(1, 20000 // size)
+    repeat = 5 if size < 1000 or kind != "broken links" else 1
+    old = min(timeit.repeat(lambda: old_guess_syntax(message),
+                            number=number, repeat=repeat)) / number
+    new = min(timeit.repeat(lambda: new_guess_syntax(message),
+                            number=number, repeat=repeat)) / number
+
+    print("%-13s %5s chars %11.1f us %8.3f us/char %9.1f us %6.3f us/char" % (
+        kind, size, old * 1e6, old * 1e6 / size, new * 1e6, new * 1e6 / size,
+    ))
+
+
+if __name__ == "__main__":
+    print("%-26s%31s%31s" % ("", "old", "new"))
+    for kind in MESSAGES:
+        for size in 10, 100, 1000, 4096:
+            bench(kind, size)
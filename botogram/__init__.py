@@ -26,7 +26,7 @@ del configure_logger
 
 # flake8: noqa
 
-from .api import APIError, ChatUnavailableError
+from .api import APIError, ChatUnavailableError, RetryPolicy
 from .bot import Bot, create, channel
 from .frozenbot import FrozenBotError
 from .components import Component
@@ -35,6 +35,7 @@ from .runner import run
 from .objects import *
 from .utils import usernames_in
 from .callbacks import Buttons, ButtonsRow
+from .ratelimit import RateLimiter
 from .inline import (
     InlineInputMessage,
     InlineInputLocation,
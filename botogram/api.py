@@ -18,9 +18,14 @@
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #   DEALINGS IN THE SOFTWARE.
 
+import asyncio
+import concurrent.futures
+import functools
+import json
 import os
-
-import requests
+import random
+import threading
+import time
 
 
 # These API methods sends something to a chat
@@ -39,6 +44,17 @@ SEND_TO_CHAT_METHODS = (
     "getChat",
 )
 
+# Requests to these API methods can be safely sent multiple times, so they're
+# retried also after network errors
+IDEMPOTENT_METHODS_PREFIXES = (
+    "get",
+    "edit",
+    "delete",
+    "set",
+    "pin",
+    "unpin",
+)
+
 
 class APIError(Exception):
     """Something went wrong with the API"""
@@ -80,10 +96,92 @@ class ChatUnavailableError(APIError):
         Exception.__init__(self, msg)
 
 
+class RetryPolicy:
+    """Decide if and when failed API requests should be retried"""
+
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=30,
+                 max_retry_after=60, budget=10, budget_ratio=0.2):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.budget = budget
+        self.budget_ratio = budget_ratio
+
+        self._available = budget
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return rebuild_retry_policy, (
+            self.max_retries, self.backoff, self.max_backoff,
+            self.max_retry_after, self.budget, self.budget_ratio,
+        )
+
+    def _wanted_delay(self, method, attempt, content, error):
+        """Get the delay before the next attempt, ignoring the budget"""
+        if attempt >= self.max_retries:
+            return
+
+        # Telegram rejected the request because of the flood limits, and told
+        # us how long to wait: the request wasn't executed, so it's always
+        # safe to send it again
+        if content is not None and content.get("error_code") == 429:
+            retry_after = content.get("parameters", {}).get("retry_after")
+            if retry_after is not None and retry_after <= self.max_retry_after:
+                return retry_after
+            return
+
+        # Network errors and server errors may happen after the request was
+        # executed, so only idempotent methods are retried
+        transient = error is not None or content.get("error_code", 0) >= 500
+        if not transient or not method.startswith(IDEMPOTENT_METHODS_PREFIXES):
+            return
+
+        # Exponential backoff, with jitter to avoid synchronized retries
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def retry_delay(self, method, attempt, content=None, error=None):
+        """Get how long to wait before retrying, or None to give up"""
+        with self._lock:
+            if method not in self._stats:
+                self._stats[method] = {
+                    "calls": 0, "retries": 0, "failures": 0, "retry_time": 0,
+                }
+            stats = self._stats[method]
+
+            # Each call earns a fraction of a retry, so retries can't amplify
+            # an outage by more than budget_ratio
+            if attempt == 0:
+                stats["calls"] += 1
+                self._available = min(self.budget,
+                                      self._available + self.budget_ratio)
+
+            if content is not None and content["ok"]:
+                return
+
+            delay = self._wanted_delay(method, attempt, content, error)
+            if delay is None or self._available < 1:
+                stats["failures"] += 1
+                return
+
+            self._available -= 1
+            stats["retries"] += 1
+            stats["retry_time"] += delay
+            return delay
+
+    def stats(self):
+        """Get the retry counters of each API method"""
+        with self._lock:
+            return {method: stats.copy()
+                    for method, stats in self._stats.items()}
+
+
 class TelegramAPI:
     """Main interface to the Telegram API"""
 
-    def __init__(self, api_key, endpoint=None):
+    def __init__(self, api_key, endpoint=None, rate_limiter=None):
         # Fill the default API endpoint
         if endpoint is None:
             endpoint = "https://api.telegram.org/"
@@ -91,26 +189,89 @@ class TelegramAPI:
         self._api_key = api_key
         self._endpoint = endpoint
 
-        self._session_cache = None
-        self._session_pid = -1
+        # Requests are sent as soon as possible if no limiter is provided
+        self.rate_limiter = rate_limiter
+        self.retry_policy = RetryPolicy()
+
+        self._sessions = {}
+        self._sessions_pid = -1
 
     def _session(self):
-        """Get the current requests session"""
-        # Ensure a new session is created if the PID changes. This is because
+        """Get the requests session of the current thread"""
+        # Ensure new sessions are created if the PID changes. This is because
         # sessions behaves badly if you use them after fork()
-        if self._session_pid != os.getpid() or self._session_cache is None:
-            self._session_cache = requests.Session()
-            self._session_pid = os.getpid()
+        if self._sessions_pid != os.getpid():
+            self._sessions = {}
+            self._sessions_pid = os.getpid()
 
-        return self._session_cache
+        # Sessions aren't thread-safe, so each thread gets its own one
+        thread = threading.get_ident()
+        if thread not in self._sessions:
+            # requests is slow to import, so it's imported only when needed
+            import requests
+            self._sessions[thread] = requests.Session()
+
+        return self._sessions[thread]
 
     def call(self, method, params=None, files=None, expect=None):
         """Call a method of the API"""
+        import requests
+
+        attempt = 0
+        while True:
+            # Queue the request if it would exceed the flood limits
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait(method, params)
+
+            content = None
+            error = None
+            try:
+                content = self._request(method, params, files)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout, ValueError) as e:
+                # ValueError is raised when the response isn't valid JSON,
+                # for example with error pages of the reverse proxies
+                error = e
+
+            delay = None
+            if self.retry_policy is not None:
+                delay = self.retry_policy.retry_delay(method, attempt,
+                                                      content, error)
+            if delay is None:
+                break
+
+            _rewind_files(files)
+            time.sleep(delay)
+            attempt += 1
+
+        if error is not None:
+            raise error
+
+        return self._process_response(method, params, content, expect)
+
+    def _request(self, method, params, files):
+        """Send a single request to the API, and return its JSON content"""
         url = self._endpoint + "bot%s/%s" % (self._api_key, method)
-        response = self._session().get(url, params=params, files=files,
-                                       timeout=10)
-        content = response.json()
 
+        # Long polling requests are kept open by Telegram until their timeout
+        timeout = 10
+        if method == "getUpdates" and params is not None:
+            timeout += params.get("timeout", 0)
+
+        # Parameters are sent as a JSON body, so nested values (like keyboards
+        # and inline results) are encoded only once. Files can be uploaded
+        # only with multipart/form-data though, which supports just flat values
+        if files:
+            response = self._session().post(url, data=_form_data(params),
+                                            files=files, timeout=timeout)
+        else:
+            response = self._session().post(url, json=params,
+                                            timeout=timeout)
+
+        return response.json()
+
+    def _process_response(self, method, params, content, expect):
+        """Check the response of the API and wrap its result"""
         if not content["ok"]:
             status = content["error_code"]
             message = content["description"]
@@ -178,6 +339,8 @@ class TelegramAPI:
 
     def file_content(self, path):
         """Get the content of an user-submitted file"""
+        import requests
+
         url = self._endpoint + "file/bot%s/%s" % (self._api_key, path)
         response = requests.get(url)
 
@@ -186,3 +349,88 @@ class TelegramAPI:
     @property
     def token(self):
         return self._api_key
+
+
+def _form_data(params):
+    """Convert the parameters of a call to multipart/form-data fields"""
+    if params is None:
+        return
+
+    result = {}
+    for key, value in params.items():
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        result[key] = value
+    return result
+
+
+def _rewind_files(files):
+    """Rewind the files to upload, so they can be sent again"""
+    if not files:
+        return
+
+    # Files are provided either as a dict or as a list of (name, file) tuples
+    if isinstance(files, dict):
+        files = files.items()
+    for _, file in files:
+        if isinstance(file, tuple):
+            file = file[-1]
+        if hasattr(file, "seek"):
+            file.seek(0)
+
+
+def rebuild_retry_policy(*args):
+    return RetryPolicy(*args)
+
+
+class AsyncTelegramAPI:
+    """Awaitable interface to the Telegram API"""
+
+    def __init__(self, api_key, endpoint=None, concurrency=100,
+                 rate_limiter=None):
+        self.sync = TelegramAPI(api_key, endpoint, rate_limiter)
+        self.concurrency = concurrency
+
+        self._executor_cache = None
+        self._executor_pid = -1
+
+    def _executor(self):
+        """Get the thread pool the requests are sent from"""
+        # Thread pools don't survive fork(), so create a new one if the PID
+        # changes, as the sync API does with its sessions
+        if self._executor_pid != os.getpid() or self._executor_cache is None:
+            self._executor_cache = concurrent.futures.ThreadPoolExecutor(
+                self.concurrency,
+            )
+            self._executor_pid = os.getpid()
+
+        return self._executor_cache
+
+    def _run(self, func, *args):
+        """Run a blocking function without blocking the event loop"""
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self._executor(),
+                                    functools.partial(func, *args))
+
+    # The methods return futures instead of being coroutines, so this module
+    # can still be imported on Python 3.4, where there is no async/await
+
+    def call(self, method, params=None, files=None, expect=None):
+        """Call a method of the API"""
+        # Wrapped objects are bound to the sync API, so their methods can be
+        # used from the usual, blocking hooks
+        return self._run(self.sync.call, method, params, files, expect)
+
+    def file_content(self, path):
+        """Get the content of an user-submitted file"""
+        return self._run(self.sync.file_content, path)
+
+    def close(self):
+        """Wait for all the pending requests and release the threads"""
+        if self._executor_cache is not None:
+            self._executor_cache.shutdown()
+            self._executor_cache = None
+
+    @property
+    def token(self):
+        return self.sync.token
@@ -22,8 +22,6 @@ import re
 import logbook
 import uuid
 
-import requests.exceptions
-
 from . import api
 from . import callbacks
 from . import objects
@@ -36,6 +34,7 @@ from . import inline
 from . import shared
 from . import tasks
 from . import messages
+from . import hooks
 
 
 class Bot(frozenbot.FrozenBot):
@@ -116,7 +115,12 @@ class Bot(frozenbot.FrozenBot):
             else:
                 self.logger.error("Response from Telegram: %s" % e.description)
             exit(1)
-        except requests.exceptions.ConnectionError:
+        except Exception as e:
+            # requests is imported by the API only when it's used
+            import requests.exceptions
+            if not isinstance(e, requests.exceptions.ConnectionError):
+                raise
+
             self.logger.error("Can't reach Telegram servers! Are you sure "
                               "you're connected to the internet?")
             exit(1)
@@ -137,6 +141,11 @@ class Bot(frozenbot.FrozenBot):
             self.logger.warn("This can cause security issues. Please enable "
                              "it again.")
 
+        # The frozen instance used by process() must be created again when
+        # the bot changes
+        if name != "_frozen_cache":
+            object.__setattr__(self, "_frozen_cache", None)
+
         # Use the standard __setattr__
         return object.__setattr__(self, name, value)
 
@@ -269,12 +278,16 @@ class Bot(frozenbot.FrozenBot):
         # Updates are always processed in a frozen instance
         # This way there aren't inconsistencies between the runner and manual
         # update processing
-        frozen = self.freeze()
-        return frozen.process(update)
-
-    def run(self, workers=2):
+        # The frozen instance is reused until the bot or its components change,
+        # since freezing the bot for each update would be slow
+        revision = self._get_revision()
+        if self._frozen_cache is None or self._frozen_cache[0] != revision:
+            self._frozen_cache = revision, self.freeze()
+        return self._frozen_cache[1].process(update)
+
+    def run(self, workers=2, **options):
         """Run the bot with the multi-process runner"""
-        inst = runner.BotogramRunner(self, workers=workers)
+        inst = runner.BotogramRunner(self, workers=workers, **options)
         inst.run()
 
     def register_update_processor(self, kind, processor):
@@ -287,11 +300,21 @@ class Bot(frozenbot.FrozenBot):
 
         self._update_processors[kind] = processor
 
+    def _get_revision(self):
+        """Get a value which changes each time an hook is added to the bot"""
+        components = [self._main_component] + self._components
+        return tuple(component._get_revision() for component in components)
+
     def freeze(self):
         """Return a frozen instance of the bot"""
         chains = components.merge_chains(self._main_component,
                                          *self._components)
 
+        # Commands and texts are looked up instead of trying each hook
+        chains["messages"] = hooks.match_texts(
+            hooks.route_commands(chains["messages"])
+        )
+
         return frozenbot.FrozenBot(self.api, self.about, self.owner,
                                    self._hide_commands, self.before_help,
                                    self.after_help, self.link_preview_in_help,
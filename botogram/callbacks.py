@@ -41,11 +41,11 @@ class ButtonsRow:
 
     def callback(self, label, callback, data=None):
         """Trigger a callback when the button is pressed"""
-        def generate_callback_data(chat):
+        def generate_callback_data(signer):
             c = ctx()
 
             name = "%s:%s" % (c.component_name(), callback)
-            return get_callback_data(c.bot, chat, name, data)
+            return signer.callback_data(name, data)
 
         self._content.append({
             "text": label,
@@ -65,7 +65,7 @@ class ButtonsRow:
                 "switch_inline_query": query,
             })
 
-    def _get_content(self, chat):
+    def _get_content(self, signer):
         """Get the content of this row"""
         for item in self._content:
             new = item.copy()
@@ -74,7 +74,7 @@ class ButtonsRow:
             # This allows to dynamically generate field values
             for key, value in new.items():
                 if callable(value):
-                    new[key] = value(chat)
+                    new[key] = value(signer)
 
             yield new
 
@@ -91,8 +91,14 @@ class Buttons:
         return self._rows[index]
 
     def _serialize_attachment(self, chat=None):
+        # All the callbacks of the keyboard are signed together
+        signer = None
+        c = ctx()
+        if c is not None:
+            signer = CallbackSigner(c.bot, chat)
+
         rows = [
-            list(row._get_content(chat)) for i, row in sorted(
+            list(row._get_content(signer)) for i, row in sorted(
                 tuple(self._rows.items()), key=lambda i: i[0]
             )
         ]
@@ -128,34 +134,52 @@ def parse_callback_data(bot, chat, raw):
         return name, None
 
 
-def get_callback_data(bot, chat, name, data=None):
-    """Get the callback data for the provided name and data"""
-    name = hashed_callback_name(name)
+class CallbackSigner:
+    """Sign the callbacks of a chat, sharing the work between them"""
 
-    if data is None:
-        data = ""
-    data = data.encode("utf-8")
+    def __init__(self, bot, chat):
+        self._mac = crypto.get_keyed_hmac(bot)
 
-    if len(data) > 32:
-        raise ValueError(
-            "The provided data is too big (%s bytes), try to reduce it to "
-            "32 bytes" % len(data)
-        )
+        if chat is None:
+            self._chat_id = b'00000000'
+        else:
+            self._chat_id = str(chat.id).encode("utf-8")
+
+    def signature(self, name, data):
+        """Generate a signature for the provided information"""
+        mac = self._mac.copy()
+        mac.update(name + b'\0' + self._chat_id + b'\0' + data)
+        return mac.digest()
+
+    def callback_data(self, name, data=None):
+        """Get the callback data for the provided name and data"""
+        name = hashed_callback_name(name)
+
+        if data is None:
+            data = ""
+        data = data.encode("utf-8")
+
+        if len(data) > 32:
+            raise ValueError(
+                "The provided data is too big (%s bytes), try to reduce it to "
+                "32 bytes" % len(data)
+            )
 
-    # Get the signature of the hook name and data
-    signature = get_signature(bot, chat, name, data)
+        # Get the signature of the hook name and data
+        signature = self.signature(name, data)
 
-    # Base64 the signature and the hook name together to save space
-    return (base64.b64encode(signature + name) + data).decode("utf-8")
+        # Base64 the signature and the hook name together to save space
+        return (base64.b64encode(signature + name) + data).decode("utf-8")
+
+
+def get_callback_data(bot, chat, name, data=None):
+    """Get the callback data for the provided name and data"""
+    return CallbackSigner(bot, chat).callback_data(name, data)
 
 
 def get_signature(bot, chat, name, data):
     """Generate a signature for the provided information"""
-    if chat is None:
-        chat_id = b'00000000'
-    else:
-        chat_id = str(chat.id).encode("utf-8")
-    return crypto.get_hmac(bot, name + b'\0' + chat_id + b'\0' + data)
+    return CallbackSigner(bot, chat).signature(name, data)
 
 
 def hashed_callback_name(name):
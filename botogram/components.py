@@ -282,6 +282,18 @@ class Component:
         """Get all the commands this component implements"""
         return self.__commands
 
+    def _get_revision(self):
+        """Get a number which changes each time an hook is added"""
+        # Hooks can't be removed, so counting them is enough
+        return sum(len(hooks) for hooks in (
+            self.__commands, self.__callbacks, self.__inline,
+            self.__inline_feedback, self.__processors, self.__no_commands,
+            self.__before_processors, self.__memory_preparers, self.__timers,
+            self.__chat_unavailable_hooks, self.__messages_edited_hooks,
+            self.__channel_post_hooks, self.__channel_post_edited_hooks,
+            self.__poll_update_hooks,
+        ))
+
 
 def merge_chains(main, *components):
     """Merge multiple chains returned by the components"""
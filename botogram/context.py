@@ -21,8 +21,16 @@
 import threading
 
 
-_local = threading.local()
-_local._botogram_context = []
+class _Local(threading.local):
+    """Per-thread storage of the contexts stack"""
+
+    def __init__(self):
+        # This is called again in every thread which uses the object, so hooks
+        # running in worker threads get their own stack
+        self._botogram_context = []
+
+
+_local = _Local()
 
 
 class Context:
@@ -18,6 +18,7 @@
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #   DEALINGS IN THE SOFTWARE.
 
+import functools
 import hmac
 
 
@@ -29,16 +30,38 @@ class TamperedMessageError(Exception):
     pass
 
 
+# How many bots the keyed HMACs are cached for
+KEYED_HMACS_CACHE_SIZE = 32
+
+
 def generate_secret_key(bot):
     """Generate the secret key of the bot"""
-    mac = hmac.new(bot.api.token.encode("utf-8"), digestmod=DIGEST)
-    mac.update(b"botogram" + bot.itself.username.encode("utf-8"))
+    return _secret_key(bot.api.token, bot.itself.username)
+
+
+def _secret_key(token, username):
+    """Generate the secret key of a bot from its token and username"""
+    mac = hmac.new(token.encode("utf-8"), digestmod=DIGEST)
+    mac.update(b"botogram" + username.encode("utf-8"))
     return mac.digest()
 
 
+# HMACs keyed with the secret key of the latest bots, which are copied
+# instead of deriving the key again for every piece of data
+@functools.lru_cache(maxsize=KEYED_HMACS_CACHE_SIZE)
+def _keyed_hmac(token, username):
+    """Create an HMAC keyed with the secret key of a bot"""
+    return hmac.new(_secret_key(token, username), digestmod=DIGEST)
+
+
+def get_keyed_hmac(bot):
+    """Get an HMAC keyed with the secret key of the bot, to copy"""
+    return _keyed_hmac(bot.api.token, bot.itself.username)
+
+
 def get_hmac(bot, data):
     """Get the HMAC of a piece of data"""
-    mac = hmac.new(generate_secret_key(bot), digestmod=DIGEST)
+    mac = get_keyed_hmac(bot).copy()
     mac.update(data)
     return mac.digest()
 
@@ -270,18 +270,21 @@ class FrozenBot:
 
     def _call(self, func, component=None, **available):
         """Wrapper for calling user-provided functions"""
+        plan = utils.call_plan(func)
+
         # Set some default available arguments
         available.setdefault("bot", self)
 
-        # Add the `shared` argument only if a component was provided
-        if component is not None:
+        # Add the `shared` argument only if a component was provided, and
+        # only if the function needs it
+        if component is not None and "shared" in plan.names:
             # It's lazily loaded so it won't make an IPC call on the runner
             def lazy_shared():
                 return self._shared_memory.of(self._bot_id, component)
 
             available.setdefault("shared", utils.CallLazyArgument(lazy_shared))
 
-        return utils.call(func, **available)
+        return plan.call(func, available)
 
     # This function allows to use the old, deprecated bot.hide_commands
 
@@ -18,7 +18,6 @@
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 
 from inspect import Parameter
-import json
 import logbook
 import re
 from time import time
@@ -36,6 +35,7 @@ class Hook:
 
     _only_texts = False
     _botogram_hook = True
+    is_group = False
 
     def __init__(self, func, component, args=None):
         prefix = ""
@@ -222,6 +222,15 @@ class CommandHook(Hook):
         if match.group(1) and match.group(1) != "@" + bot.itself.username:
             return
 
+        return self._execute(bot, message, text)
+
+    def call_routed(self, bot, update, text):
+        """Call the hook for a message already matched by the router"""
+        with Context(bot, self, update):
+            return self._execute(bot, update.message, text)
+
+    def _execute(self, bot, message, text):
+        """Execute the command contained in the message"""
         args = _command_args_split_re.split(text)[1:]
         params = {}
 
@@ -248,6 +257,201 @@ class CommandHook(Hook):
         return True
 
 
+def _call_grouped(bot, update, hook, call, *args):
+    """Call an hook of a group, logging it as if it were in the chain"""
+    bot.logger.debug("Processing update #%s with the hook %s..." %
+                     (update.update_id, hook.name))
+
+    result = call(bot, update, *args)
+    if result is True:
+        bot.logger.debug("Update #%s was just processed by the %s hook." %
+                         (update.update_id, hook.name))
+    return result
+
+
+_command_re = re.compile(r'^\/([a-zA-Z0-9_]+)(@[a-zA-Z0-9_]+)?( .*)?$')
+
+
+class CommandsRouter:
+    """Route messages to the right command hook with a single lookup"""
+
+    name = "commands router"
+    is_group = True
+
+    def __init__(self, hooks):
+        self.hooks = hooks
+
+        # Only the first hook of each command can process it, since it
+        # always stops the processing
+        self._routes = {}
+        for hook in hooks:
+            self._routes.setdefault(hook._name, hook)
+
+    def __reduce__(self):
+        return CommandsRouter, (self.hooks,)
+
+    def __repr__(self):
+        return "<CommandsRouter %s>" % ", ".join(sorted(self._routes))
+
+    def call(self, bot, update):
+        """Call the hook of the command contained in the message"""
+        text = update.message.text
+        if text is None or not text.startswith("/"):
+            return
+        text = text.replace("\n", " ").replace("\t", " ")
+
+        # Must be a known command for the correct bot
+        match = _command_re.match(text)
+        if not match:
+            return
+        hook = self._routes.get(match.group(1))
+        if hook is None:
+            return
+        if match.group(2) and match.group(2) != "@" + bot.itself.username:
+            return
+
+        return _call_grouped(bot, update, hook, hook.call_routed, text)
+
+
+def _group_hooks(chain, classes, group_class):
+    """Replace each group of hooks of some classes in a chain"""
+    result = []
+    group = []
+    for hook in chain + [None]:
+        if isinstance(hook, classes):
+            group.append(hook)
+            continue
+
+        if group:
+            result.append(group_class(group))
+            group = []
+        if hook is not None:
+            result.append(hook)
+
+    return result
+
+
+def route_commands(chain):
+    """Replace each group of command hooks in a chain with a router"""
+    return _group_hooks(chain, CommandHook, CommandsRouter)
+
+
+# Regexes can't be combined if they use flags or refer to their own groups
+_inline_flags_re = re.compile(r'\(\?[aiLmsux]+\)')
+_backreference_re = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+
+def _combinable(hook):
+    """Check if the regex of a message matches hook can be combined"""
+    regex = hook._args["regex"]
+    if not isinstance(regex, str):
+        return False
+    if hook._args["flags"] & (re.VERBOSE | re.DEBUG):
+        return False
+    if hook._regex.groupindex or _inline_flags_re.search(regex):
+        return False
+    return _backreference_re.search(regex) is None
+
+
+class TextMatchers:
+    """Find the text matching hooks to call without trying each one"""
+
+    name = "text matchers"
+    is_group = True
+
+    def __init__(self, hooks):
+        self.hooks = hooks
+
+        # Strings to look for are indexed, and they're looked up with the
+        # text or its words
+        self._equals = ({}, {})
+        self._contains = ({}, {})
+
+        # The regexes with the same flags are combined, to check if at least
+        # one of them matches with a single search
+        combined = {}
+        self._regexes = []
+        self._regexes_of = {}
+
+        for i, hook in enumerate(hooks):
+            if isinstance(hook, MessageContainsHook):
+                index = self._contains[hook._args["ignore_case"]]
+                index.setdefault(hook._string, []).append(i)
+            elif isinstance(hook, MessageEqualsHook):
+                index = self._equals[hook._args["ignore_case"]]
+                index.setdefault(hook._string, []).append(i)
+            elif _combinable(hook):
+                flags = hook._args["flags"]
+                combined.setdefault(flags, []).append(i)
+
+        for flags, indexes in combined.items():
+            try:
+                regex = re.compile("|".join(
+                    "(?:%s)" % hooks[i]._args["regex"] for i in indexes
+                ), flags)
+            except re.error:
+                continue
+
+            for i in indexes:
+                self._regexes_of[i] = len(self._regexes)
+            self._regexes.append(regex)
+
+    def __reduce__(self):
+        return TextMatchers, (self.hooks,)
+
+    def __repr__(self):
+        return "<TextMatchers %s>" % len(self.hooks)
+
+    def _matching(self, text):
+        """Get the hooks which might match the text"""
+        lower = text.lower()
+        result = set()
+
+        for ignore_case, string in (False, text), (True, lower):
+            result.update(self._equals[ignore_case].get(string, ()))
+
+            index = self._contains[ignore_case]
+            if index:
+                for word in set(string.split(" ")):
+                    result.update(index.get(word, ()))
+
+        return result
+
+    def call(self, bot, update):
+        """Call the hooks matching the text of the message"""
+        text = update.message.text
+        if text is None:
+            return
+
+        matching = self._matching(text)
+        regexes = [None] * len(self._regexes)
+
+        for i, hook in enumerate(self.hooks):
+            if isinstance(hook, MessageMatchesHook):
+                # Skip the search if none of the combined regexes matches
+                combined = self._regexes_of.get(i)
+                if combined is not None:
+                    if regexes[combined] is None:
+                        regexes[combined] = bool(
+                            self._regexes[combined].search(text)
+                        )
+                    if not regexes[combined]:
+                        continue
+            elif i not in matching:
+                continue
+
+            # The hook checks again the text, but only if it's likely to
+            # match it
+            if _call_grouped(bot, update, hook, hook.call) is True:
+                return True
+
+
+def match_texts(chain):
+    """Replace each group of text matching hooks in a chain"""
+    return _group_hooks(chain, (MessageEqualsHook, MessageMatchesHook),
+                        TextMatchers)
+
+
 class CallbackHook(Hook):
     """Underlying hook for @bot.callback"""
 
@@ -350,7 +554,7 @@ class InlineHook(Hook):
             "inline_query_id": inline.id,
             "cache_time": cache,
             "is_personal": is_private,
-            "results": json.dumps(results),
+            "results": results,
             "next_offset": next_offset,
         }
         if hook_locals._switch_pm_text is not None:
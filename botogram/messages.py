@@ -22,6 +22,12 @@
 def process_message(bot, chains, update):
     """Process a message sent to the bot"""
     for hook in chains["messages"]:
+        # Groups of hooks log the hooks they actually call by themselves
+        if hook.is_group:
+            if hook.call(bot, update) is True:
+                return
+            continue
+
         bot.logger.debug("Processing update #%s with the hook %s..." %
                          (update.update_id, hook.name))
 
@@ -18,13 +18,59 @@
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #   DEALINGS IN THE SOFTWARE.
 
+import keyword
+import os
+
 
 # This is used to make a reference to the current class while defining the
 # fields table, since it's impossible to reference the class while defining it
 _itself = object()
 
 
-class BaseObject:
+# If the BOTOGRAM_COMPACT_OBJECTS environment variable is set, the fields of
+# the objects are stored in __slots__ instead of in their __dict__, to save
+# memory. It must be set before botogram is imported
+COMPACT_OBJECTS = "BOTOGRAM_COMPACT_OBJECTS" in os.environ
+
+# If the BOTOGRAM_LAZY_OBJECTS environment variable is set, the fields
+# containing other objects are parsed only when they're accessed for the
+# first time. It must be set before botogram is imported
+LAZY_OBJECTS = "BOTOGRAM_LAZY_OBJECTS" in os.environ
+
+
+def _slots(bases, namespace):
+    """Get the __slots__ of a compact class"""
+    existing = set()
+    for base in bases:
+        for cls in base.__mro__:
+            existing.update(cls.__dict__.get("__slots__", ()))
+
+    result = []
+    names = []
+    for group in namespace.get("required", {}), namespace.get("optional", {}):
+        replace_keys = namespace.get("replace_keys", {})
+        names += [replace_keys.get(key, key) for key in group]
+    names += namespace.get("_extra_slots_", ())
+
+    # Names defined in the class and invalid names can't be slots
+    for name in names:
+        if name in existing or name in namespace or name in result:
+            continue
+        if name.isidentifier():
+            result.append(name)
+    return tuple(result)
+
+
+class _ObjectType(type):
+    """Metaclass of the API types, which adds the __slots__ if needed"""
+
+    def __new__(mcs, name, bases, namespace):
+        if COMPACT_OBJECTS and "__slots__" not in namespace:
+            namespace["__slots__"] = _slots(bases, namespace)
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class BaseObject(metaclass=_ObjectType):
     """A base class for all of the API types"""
 
     required = {}
@@ -32,39 +78,48 @@ class BaseObject:
     replace_keys = {}
     _check_equality_ = None
 
+    # Type of the JSON values the objects are created from
+    _raw_type_ = dict
+
+    # Attributes which are not fields but have a slot in compact objects
+    # Other attributes are stored in the __dict__, created only when needed
+    _extra_slots_ = ("_api", "_lazy", "__dict__")
+
     def __init__(self, data, api=None):
         # Prevent receiving strange types
         if not isinstance(data, dict):
             raise ValueError("A dict must be provided")
 
         # Populate the namespace
-        for group, required in ((self.required, True), (self.optional, False)):
-            for key, field_type in group.items():
-                # A required key must be present
-                if key not in data and required:
-                    raise ValueError("The key %s must be present" % key)
+        try:
+            parse = _parsers[self.__class__]
+        except KeyError:
+            parse = _compile_parser(self.__class__)
+        parse(self, data)
 
-                # If the field type is _itself, replace it with this class
-                if field_type is _itself:
-                    field_type = self.__class__
+        if api is not None:
+            self.set_api(api)
 
-                # Replace the keys -- useful for reserved keywords
-                new_key = key
-                if key in self.replace_keys:
-                    new_key = self.replace_keys[key]
+    if LAZY_OBJECTS:
+        def __getattr__(self, name):
+            # This is called only if the attribute doesn't exist, so lazy
+            # fields not parsed yet end up here
+            if name != "_lazy":
+                lazy = getattr(self, "_lazy", {})
+                raw = lazy.get(name, _itself)
+                if raw is not _itself:
+                    value = _lazy_fields[self.__class__][name](raw)
 
-                # Don't resolve non-present keys
-                if key not in data:
-                    setattr(self, new_key, None)
-                    continue
+                    api = getattr(self, "_api", None)
+                    if api is not None and hasattr(value, "set_api"):
+                        value.set_api(api)
 
-                # It's important to note that the value is validated passing
-                # it in the field_type. This allows also automatic resolution
-                # of types nesting
-                setattr(self, new_key, field_type(data[key]))
+                    setattr(self, name, value)
+                    lazy.pop(name, None)
+                    return value
 
-        if api is not None:
-            self.set_api(api)
+            raise AttributeError("%r object has no attribute %r" % (
+                self.__class__.__name__, name))
 
     def __eq__(self, other):
         to_check = self._check_equality_
@@ -82,18 +137,11 @@ class BaseObject:
         self._api = api
 
         # Recursively set the API
-        for key in list(self.required.keys()) + list(self.optional.keys()):
-            # Be sure to use the right key
-            if key in self.replace_keys:
-                key = self.replace_keys[key]
-
-            value = getattr(self, key)
-            if value is None:
-                continue
-
-            # Update the API, if it supports that
-            if hasattr(value, "set_api"):
-                value.set_api(api)
+        try:
+            set_api = _api_setters[self.__class__]
+        except KeyError:
+            set_api = _compile_api_setter(self.__class__)
+        set_api(self, api)
 
     def serialize(self):
         """Serialize this object"""
@@ -134,6 +182,132 @@ class BaseObject:
         return item
 
 
+# Parsers and API setters generated for each class, with the fields unrolled
+_parsers = {}
+_api_setters = {}
+
+# Types of the lazy fields of each class
+_lazy_fields = {}
+
+# Values of these types never contain other objects
+_plain_types = (int, float, str, bool, list, dict)
+
+
+def _fields(cls):
+    """Get the fields of a class, with the attribute names and types"""
+    for group, required in ((cls.required, True), (cls.optional, False)):
+        for key, field_type in group.items():
+            # If the field type is _itself, replace it with this class
+            if field_type is _itself:
+                field_type = cls
+
+            # Replace the keys -- useful for reserved keywords
+            yield key, cls.replace_keys.get(key, key), field_type, required
+
+
+def _attribute(attr):
+    """Check if an attribute can be accessed without getattr and setattr"""
+    return attr.isidentifier() and not keyword.iskeyword(attr)
+
+
+def _assignment(attr, value):
+    """Get the source code of an attribute assignment"""
+    if _attribute(attr):
+        return "self.%s = %s" % (attr, value)
+    return "setattr(self, %r, %s)" % (attr, value)
+
+
+def _compile(cls, name, arg, lines, namespace):
+    """Compile a function for a class"""
+    source = "def %s(self, %s):\n    %s\n" % (
+        name, arg, "\n    ".join(lines or ["pass"]),
+    )
+    exec(compile(source, "<botogram %s.%s>" % (cls.__name__, name), "exec"),
+         namespace)
+    return namespace[name]
+
+
+def _lazy(field_type):
+    """Check if a field should be parsed lazily"""
+    # The type of the raw values must be known, so it's still checked when
+    # the object is created
+    return LAZY_OBJECTS and hasattr(field_type, "_raw_type_")
+
+
+def _compile_parser(cls):
+    """Generate the function populating the fields of a class"""
+    lines = []
+    namespace = {}
+    lazy_fields = _lazy_fields[cls] = {}
+    for i, (key, attr, field_type, required) in enumerate(_fields(cls)):
+        namespace["type%s" % i] = field_type
+
+        # It's important to note that the value is validated passing it in
+        # the field_type. This allows also automatic resolution of types
+        # nesting. Lazy fields keep the raw value until they're accessed,
+        # checking only its type
+        if _lazy(field_type):
+            lazy_fields[attr] = field_type
+            namespace["raw%s" % i] = field_type._raw_type_
+            assign = [
+                "if not isinstance(data[%r], raw%s):" % (key, i),
+                "    raise ValueError(%r)" % (
+                    "The key %s has an invalid type" % key),
+                "lazy[%r] = data[%r]" % (attr, key),
+            ]
+        else:
+            value = "type%s(data[%r])" % (i, key)
+            assign = [_assignment(attr, value)]
+
+        if required:
+            lines += [
+                "if %r not in data:" % key,
+                "    raise ValueError(%r)" % (
+                    "The key %s must be present" % key),
+            ] + assign
+        else:
+            lines += ["if %r in data:" % key]
+            lines += ["    " + line for line in assign]
+            lines += [
+                "else:",
+                "    " + _assignment(attr, "None"),
+            ]
+
+    if lazy_fields:
+        lines.insert(0, "self._lazy = lazy = {}")
+
+    parser = _parsers[cls] = _compile(cls, "parse", "data", lines, namespace)
+    return parser
+
+
+def _compile_api_setter(cls):
+    """Generate the function setting the API of the fields of a class"""
+    lines = []
+    for key, attr, field_type, required in _fields(cls):
+        if field_type in _plain_types:
+            continue
+
+        # Update the API, if it supports that
+        update = [
+            "value = %s" % ("self.%s" % attr if _attribute(attr)
+                            else "getattr(self, %r)" % attr),
+            "if value is not None and hasattr(value, 'set_api'):",
+            "    value.set_api(api)",
+        ]
+
+        # Lazy fields receive the API when they're parsed
+        if _lazy(field_type):
+            update = ["if %r not in lazy:" % attr] + [
+                "    " + line for line in update
+            ]
+            if "lazy = self._lazy" not in lines:
+                lines.append("lazy = self._lazy")
+        lines += update
+
+    setter = _api_setters[cls] = _compile(cls, "set_api", "api", lines, {})
+    return setter
+
+
 class _MultipleList(list):
     """Custom list which adds the set_api method"""
 
@@ -152,4 +326,5 @@ def multiple(field_type):
                              % field_type)
 
         return _MultipleList([field_type(item) for item in objects])
+    __._raw_type_ = list
     return __
@@ -45,6 +45,7 @@ class CallbackQuery(BaseObject):
         "from": "sender",
         "data": "_data",
     }
+    _extra_slots_ = ("is_inline", "_answered")
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -46,6 +46,7 @@ class User(BaseObject, mixins.ChatMixin):
         "language_code": "lang",
     }
     _check_equality_ = "id"
+    _extra_slots_ = ("_avatar",)
 
     @property
     def name(self):
@@ -122,6 +123,11 @@ class Chat(BaseObject, mixins.ChatMixin):
         "photo": "_photo",
     }
     _check_equality_ = "id"
+    _extra_slots_ = (
+        "pinned_message", "_cache_user", "_cache_admins", "_cache_creator",
+        "_cache_members_count", "_cache_status_of", "_cache_invite_link",
+        "_cache_photo",
+    )
 
     def _to_user(self):
         """Convert this Chat object to an User object"""
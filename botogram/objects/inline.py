@@ -37,6 +37,7 @@ class InlineQuery(BaseObject, mixins.InlineMixin):
     replace_keys = {
         "from": "sender"
     }
+    _extra_slots_ = ("_switch_pm_text", "_switch_pm_parameter")
 
     def __init__(self, data):
         super().__init__(data)
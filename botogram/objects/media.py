@@ -54,6 +54,7 @@ class ChatPhoto(BaseObject, mixins.FileMixin):
         "big_file_id": "big",
     }
     _check_equality_ = "small_file_id"
+    _extra_slots_ = ("file_id",)
 
     def save(self, *args, small=False, **kwargs):
         """Workaround for dealing with big and small chat photos"""
@@ -72,6 +73,8 @@ class Photo(mixins.FileMixin):
     provide a better one.
     """
 
+    _raw_type_ = list
+
     def __init__(self, data, api=None):
         self._api = api
         # Accept only lists of PhotoSize
@@ -18,7 +18,10 @@
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #   DEALINGS IN THE SOFTWARE.
 
+import collections
 import re
+import threading
+import time
 from base64 import urlsafe_b64decode
 from struct import unpack
 
@@ -34,6 +37,37 @@ from .polls import Poll
 
 _url_protocol_re = re.compile(r"^https?:\/\/|s?ftp:\/\/|mailto:", re.I)
 
+# The chats of the inline messages are fetched only when they're used, and
+# they're cached for INLINE_CHATS_TTL seconds, so the callbacks of the same
+# messages don't fetch them again
+INLINE_CHATS_CACHE_SIZE = 1000
+INLINE_CHATS_TTL = 600
+
+_inline_chats = collections.OrderedDict()
+_inline_chats_lock = threading.Lock()
+
+
+def _inline_chat(api, chat_id):
+    """Get the chat of an inline message, fetching it only if needed"""
+    key = api.token, chat_id
+    with _inline_chats_lock:
+        cached = _inline_chats.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            _inline_chats.move_to_end(key)
+            return cached[1]
+
+    try:
+        chat = api.call("getChat", {"chat_id": chat_id}, expect=Chat)
+    except ChatUnavailableError:
+        chat = Chat({"id": chat_id}, api=api)
+
+    with _inline_chats_lock:
+        _inline_chats[key] = time.monotonic() + INLINE_CHATS_TTL, chat
+        _inline_chats.move_to_end(key)
+        while len(_inline_chats) > INLINE_CHATS_CACHE_SIZE:
+            _inline_chats.popitem(last=False)
+    return chat
+
 
 def _require_message(func):
     """Decorator which forces the object to have an attached message"""
@@ -69,6 +103,7 @@ class ParsedTextEntity(BaseObject):
         "offset": "_offset",
         "length": "_length",
     }
+    _extra_slots_ = ("_message",)
 
     # Bring some sanity to the Bot API
     replace_types = {
@@ -208,6 +243,8 @@ class ParsedText:
     object, but increases its functionalities.
     """
 
+    _raw_type_ = list
+
     def __init__(self, data, api=None, message=None):
         self._api = api
         # Accept only list of entites
@@ -371,27 +408,32 @@ class Message(BaseObject, mixins.MessageMixin):
     }
     replace_keys = {
         "from": "sender",
-        "entities": "parsed_text",
         "message_id": "id",
 
+        # This is provided dynamically by self.parsed_text
+        "entities": "_parsed_text",
+
+        # This is provided dynamically by self.chat
+        "chat": "_chat",
+
         # Those are provided dynamically by self.forward_from
         "forward_from": "_forward_from",
         "forward_from_chat": "_forward_from_chat",
         "forward_sender_name": "_forward_sender_name",
     }
     _check_equality_ = "message_id"
+    _extra_slots_ = ("is_inline", "_inline_chat_id")
 
     def __init__(self, data, api=None):
         super().__init__(data, api)
-        if self.chat is None:
+        # Check the data instead of the chat, so lazy objects don't need to
+        # parse it
+        if "chat" not in data:
             self.is_inline = True
         else:
             self.is_inline = False
-        # Create the parsed_text instance even if there are no entities in the
-        # current text
-        if self.text is not None and self.parsed_text is None:
-            self.parsed_text = ParsedText([], api, self)
-
+        # The chat of inline messages is fetched by self.chat
+        self._inline_chat_id = None
         if self.inline_message_id:
             inline_message_id = urlsafe_b64decode(
                 self.inline_message_id +
@@ -399,20 +441,42 @@ class Message(BaseObject, mixins.MessageMixin):
             _, self.id, chat_id, _ = unpack('<iiiq', inline_message_id)
             if chat_id < 0:
                 chat_id = int('-100' + str(chat_id * -1))
-            if api:
-                try:
-                    self.chat = api.call("getChat", {"chat_id": chat_id},
-                                         expect=Chat)
-                except ChatUnavailableError:
-                    self.chat = Chat({"id": chat_id,
-                                      }, api=api)
-            else:
-                self.chat = Chat({"id": chat_id})
+            self._inline_chat_id = chat_id
+
+    @property
+    def parsed_text(self):
+        """Get the entities of the text"""
+        parsed = self._parsed_text
+
+        # Create the parsed_text instance even if there are no entities in the
+        # current text
+        if parsed is None:
+            if self.text is None:
+                return
+            parsed = self._parsed_text = ParsedText(
+                [], getattr(self, "_api", None),
+            )
 
         # Be sure to set this as the Message instance in the parsed text
         # The instance is needed to calculate the content of each entity
-        if self.parsed_text is not None:
-            self.parsed_text.set_message(self)
+        if parsed._message is not self:
+            parsed.set_message(self)
+        return parsed
+
+    @parsed_text.setter
+    def parsed_text(self, value):
+        self._parsed_text = value
+
+    @property
+    def chat(self):
+        """Get the chat the message was sent to"""
+        if self._chat is None and self._inline_chat_id is not None:
+            api = getattr(self, "_api", None)
+            if api is None:
+                return Chat({"id": self._inline_chat_id})
+            self._chat = _inline_chat(api, self._inline_chat_id)
+
+        return self._chat
 
     @property
     def forward_from(self):
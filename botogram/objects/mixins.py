@@ -19,7 +19,6 @@
 #   DEALINGS IN THE SOFTWARE.
 
 import importlib
-import json
 
 from .. import syntaxes
 from .. import utils
@@ -53,6 +52,8 @@ def _require_api(func):
 class ChatMixin:
     """Add some methods for chats"""
 
+    __slots__ = ()
+
     def _get_call_args(self, reply_to, extra, attach, notify):
         """Get default API call arguments"""
         # Convert instance of Message to ids in reply_to
@@ -66,13 +67,11 @@ class ChatMixin:
             _deprecated_message(
                 "The extra parameter", "1.0", "use the attach parameter", -4
             )
-            args["reply_markup"] = json.dumps(extra.serialize())
+            args["reply_markup"] = extra.serialize()
         if attach is not None:
             if not hasattr(attach, "_serialize_attachment"):
                 raise ValueError("%s is not an attachment" % attach)
-            args["reply_markup"] = json.dumps(attach._serialize_attachment(
-                self
-            ))
+            args["reply_markup"] = attach._serialize_attachment(self)
         if not notify:
             args["disable_notification"] = True
 
@@ -377,7 +376,7 @@ class ChatMixin:
         """Send a poll"""
         args = self._get_call_args(reply_to, extra, attach, notify)
         args["question"] = question
-        args["options"] = json.dumps(list(kargs))
+        args["options"] = list(kargs)
 
         return self._api.call("sendPoll", args, expect=_objects().Message)
 
@@ -420,6 +419,8 @@ class ChatMixin:
 class MessageMixin:
     """Add some methods for messages"""
 
+    __slots__ = ()
+
     def _get_call_args(self, attach):
         if self.is_inline:
             args = {"inline_message_id": self.inline_message_id}
@@ -432,9 +433,7 @@ class MessageMixin:
                 chat = None
             else:
                 chat = self.chat
-            args["reply_markup"] = json.dumps(attach._serialize_attachment(
-                chat
-            ))
+            args["reply_markup"] = attach._serialize_attachment(chat)
         return args
 
     @_require_api
@@ -470,7 +469,7 @@ class MessageMixin:
             _deprecated_message(
                 "The extra parameter", "1.0", "use the attach parameter", -3
             )
-            args["reply_markup"] = json.dumps(extra.serialize())
+            args["reply_markup"] = extra.serialize()
 
         self._api.call("editMessageText", args)
         self.text = text
@@ -488,7 +487,7 @@ class MessageMixin:
             _deprecated_message(
                 "The extra parameter", "1.0", "use the attach parameter", -3
             )
-            args["reply_markup"] = json.dumps(extra.serialize())
+            args["reply_markup"] = extra.serialize()
         self._api.call("editMessageCaption", args)
         self.caption = caption
 
@@ -498,9 +497,7 @@ class MessageMixin:
         args = {"message_id": self.id, "chat_id": self.chat.id}
         if not hasattr(attach, "_serialize_attachment"):
             raise ValueError("%s is not an attachment" % attach)
-        args["reply_markup"] = json.dumps(attach._serialize_attachment(
-            self.chat
-        ))
+        args["reply_markup"] = attach._serialize_attachment(self.chat)
 
         self._api.call("editMessageReplyMarkup", args)
 
@@ -515,14 +512,12 @@ class MessageMixin:
             _deprecated_message(
                 "The extra parameter", "1.0", "use the attach parameter", -3
             )
-            args["reply_markup"] = json.dumps(extra.serialize())
+            args["reply_markup"] = extra.serialize()
 
         if attach is not None:
             if not hasattr(attach, "_serialize_attachment"):
                 raise ValueError("%s is not an attachment" % attach)
-            args["reply_markup"] = json.dumps(attach._serialize_attachment(
-                self.chat
-            ))
+            args["reply_markup"] = attach._serialize_attachment(self.chat)
 
         self._api.call("editMessageLiveLocation", args)
 
@@ -535,14 +530,12 @@ class MessageMixin:
             _deprecated_message(
                 "The extra parameter", "1.0", "use the attach parameter", -3
             )
-            args["reply_markup"] = json.dumps(extra.serialize())
+            args["reply_markup"] = extra.serialize()
 
         if attach is not None:
             if not hasattr(attach, "_serialize_attachment"):
                 raise ValueError("%s is not an attachment" % attach)
-            args["reply_markup"] = json.dumps(attach._serialize_attachment(
-                self.chat
-            ))
+            args["reply_markup"] = attach._serialize_attachment(self.chat)
         self._api.call("stopMessageLiveLocation", args)
 
     @_require_api
@@ -683,13 +676,11 @@ class MessageMixin:
             _deprecated_message(
                 "The extra parameter", "1.0", "use the attach parameter", -3
             )
-            args["reply_markup"] = json.dumps(extra.serialize())
+            args["reply_markup"] = extra.serialize()
         if attach is not None:
             if not hasattr(attach, "_serialize_attachment"):
                 raise ValueError("%s is not an attachment" % attach)
-            args["reply_markup"] = json.dumps(attach._serialize_attachment(
-                self.chat
-            ))
+            args["reply_markup"] = attach._serialize_attachment(self.chat)
         return self._api.call("stopPoll", args,
                               expect=_objects().Poll)
 
@@ -697,6 +688,8 @@ class MessageMixin:
 class FileMixin:
     """Add some methods for files"""
 
+    __slots__ = ()
+
     @_require_api
     def save(self, path):
         """Save the file to a particular path"""
@@ -788,7 +781,7 @@ class SendAlbum(Album):
     def send(self):
         """Send the Album to telgram"""
         args = self._get_call_args(self.reply_to, None, None, self.notify)
-        args["media"] = json.dumps(self._content)
+        args["media"] = self._content
         return self._api.call("sendMediaGroup", args, self._file,
                               expect=multiple(_objects().Message))
 
@@ -802,6 +795,8 @@ class SendAlbum(Album):
 class InlineMixin:
     """Helper class for rendering inline elements"""
 
+    __slots__ = ()
+
     @staticmethod
     def _get_call_args(result_type, title, attach, content):
         args = {
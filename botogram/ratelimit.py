@@ -0,0 +1,159 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import threading
+import time
+
+
+# Those are the limits documented by Telegram, expressed as the number of
+# messages allowed in a number of seconds
+# https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+GLOBAL_LIMIT = (30, 1)
+CHAT_LIMIT = (1, 1)
+GROUP_LIMIT = (20, 60)
+
+# Idle buckets are removed every CLEANUP_EVERY reservations
+CLEANUP_EVERY = 1000
+
+
+def is_limited(method):
+    """Check if an API method is subject to the flood limits"""
+    # Only the methods which send new messages count towards the limits
+    if method == "sendChatAction":
+        return False
+    return method.startswith("send") or method == "forwardMessage"
+
+
+class TokenBucket:
+    """A token bucket which allows reserving tokens in advance"""
+
+    def __init__(self, messages, seconds):
+        self.rate = messages / seconds
+        self.capacity = messages
+
+        self.tokens = messages
+        self.updated = None
+
+    def _refill(self, now):
+        """Add the tokens accumulated since the last update"""
+        if self.updated is None:
+            self.updated = now
+        elif now > self.updated:
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now):
+        """Get how many seconds are needed before a token is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        """Take a token from the bucket"""
+        # The count can go below zero: this way the token is reserved to the
+        # caller, which will wait until it's actually available
+        self._refill(now)
+        self.tokens -= 1
+
+    def idle(self, now):
+        """Check if the bucket is full, so it can be safely discarded"""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """Client-side rate limiter following the Telegram flood limits"""
+
+    def __init__(self, global_limit=GLOBAL_LIMIT, chat_limit=CHAT_LIMIT,
+                 group_limit=GROUP_LIMIT):
+        self.global_limit = global_limit
+        self.chat_limit = chat_limit
+        self.group_limit = group_limit
+
+        self._global = TokenBucket(*global_limit)
+        self._chats = {}
+        self._groups = {}
+        self._reservations = 0
+
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return rebuild, (self.global_limit, self.chat_limit, self.group_limit)
+
+    def _buckets(self, chat_id):
+        """Get all the buckets a message to a chat must pass through"""
+        buckets = [self._global]
+        if chat_id is None:
+            return buckets
+
+        if chat_id not in self._chats:
+            self._chats[chat_id] = TokenBucket(*self.chat_limit)
+        buckets.append(self._chats[chat_id])
+
+        # Usernames can only belong to channels and supergroups
+        if isinstance(chat_id, str) or chat_id < 0:
+            if chat_id not in self._groups:
+                self._groups[chat_id] = TokenBucket(*self.group_limit)
+            buckets.append(self._groups[chat_id])
+
+        return buckets
+
+    def _cleanup(self, now):
+        """Remove the buckets of the chats which aren't active anymore"""
+        for buckets in self._chats, self._groups:
+            for chat_id in [chat_id for chat_id, bucket in buckets.items()
+                            if bucket.idle(now)]:
+                del buckets[chat_id]
+
+    def reserve(self, chat_id, now=None):
+        """Reserve a message, and return how long to wait before sending it"""
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            self._reservations += 1
+            if self._reservations % CLEANUP_EVERY == 0:
+                self._cleanup(now)
+
+            buckets = self._buckets(chat_id)
+            delay = max(bucket.delay(now) for bucket in buckets)
+            for bucket in buckets:
+                bucket.consume(now)
+
+        return delay
+
+    def wait(self, method, params):
+        """Wait until the provided API call can be sent"""
+        if not is_limited(method):
+            return
+
+        chat_id = None
+        if params is not None:
+            chat_id = params.get("chat_id")
+
+        delay = self.reserve(chat_id)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def rebuild(global_limit, chat_limit, group_limit):
+    return RateLimiter(global_limit, chat_limit, group_limit)
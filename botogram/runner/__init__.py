@@ -29,12 +29,24 @@ from . import processes
 from . import shared
 from . import ipc
 from . import jobs
+from . import ratelimit
+from . import checkpoints
+
+
+# Seconds to wait for the updaters to stop before terminating them
+UPDATERS_SHUTDOWN_TIMEOUT = 2
+
+# Seconds between the logs of the queue statistics
+STATS_INTERVAL = 60
 
 
 class BotogramRunner:
     """A multi-process, scalable bot runner"""
 
-    def __init__(self, *bots, workers=2):
+    def __init__(self, *bots, workers=2, async_workers=False,
+                 concurrency=100, prefetch=10, chat_order=False, webhook=None,
+                 webhook_url=None, polling_timeout=30, polling_limit=100,
+                 checkpoint=None, priorities=None, shared_cache=None):
         # Only frozen instances, thanks
         self._bots = {bot._bot_id: bot.freeze() for bot in bots}
 
@@ -47,18 +59,53 @@ class BotogramRunner:
         self._stop = False
         self._started_at = None
         self._last_scheduled_checks = -1
+        self._last_stats = -1
 
         # Start the IPC server
         self._ipc_server = ipc.IPCServer()
-        self.ipc_port = self._ipc_server.port
+        self.ipc_address = self._ipc_server.address
         self.ipc_auth_key = self._ipc_server.auth_key
         self._ipc_stop_key = self._ipc_server.stop_key
 
-        # Use the MultiprocessingDriver for all the shared memories
+        # Use the MultiprocessingDriver for all the shared memories, or the
+        # cached one if a consistency level for the workers' copies is chosen
+        for bot in self._bots.values():
+            if shared_cache is None:
+                driver = shared.MultiprocessingDriver()
+            else:
+                driver = shared.CachedMultiprocessingDriver(shared_cache)
+            bot._shared_memory.switch_driver(driver)
+
+        # Move the rate limiters to the IPC process, so the limits are shared
+        # between all the workers
+        self._rate_limiters = {}
         for bot in self._bots.values():
-            bot._shared_memory.switch_driver(shared.MultiprocessingDriver())
+            if bot.api.rate_limiter is None:
+                continue
+
+            self._rate_limiters[bot._bot_id] = bot.api.rate_limiter
+            bot.api.rate_limiter = \
+                ratelimit.MultiprocessingRateLimiter(bot._bot_id)
 
         self._workers_count = workers
+        self._async_workers = async_workers
+        self._concurrency = concurrency
+        self._prefetch = prefetch
+        self._chat_order = chat_order
+        self._priorities = priorities
+
+        # If an address to listen on is provided, updates are received with a
+        # webhook instead of being fetched
+        self._webhook = webhook
+        self._webhook_url = webhook_url
+
+        self._polling_timeout = polling_timeout
+        self._polling_limit = polling_limit
+
+        # Accept a directory as a shortcut for the default store
+        if isinstance(checkpoint, str):
+            checkpoint = checkpoints.FileCheckpointStore(checkpoint)
+        self._checkpoint_store = checkpoint
 
         self.logger = logbook.Logger("botogram runner")
 
@@ -68,7 +115,7 @@ class BotogramRunner:
             raise RuntimeError("Server already running")
 
         self.logger.debug("Booting up the botogram runner...")
-        self.logger.debug("IPC address: 127.0.0.1:%s" % self.ipc_port)
+        self.logger.debug("IPC address: %s" % self.ipc_address)
         self.logger.debug("IPC auth key: %s" % self.ipc_auth_key)
 
         self.running = True
@@ -93,6 +140,7 @@ class BotogramRunner:
         self.running = False
         self._started_at = None
         self._last_scheduled_checks = -1
+        self._last_stats = -1
 
     def _loop(self):
         """The main loop"""
@@ -111,6 +159,16 @@ class BotogramRunner:
             if jobs_list:
                 self.ipc.command("jobs.bulk_put", jobs_list)
 
+        # Log the depth of the queue lanes from time to time
+        if now >= self._last_stats + STATS_INTERVAL:
+            self._last_stats = now
+
+            stats = self.ipc.command("jobs.stats", None)
+            self.logger.debug("Queued jobs: %s" % ", ".join(
+                "%s %s" % (count, lane)
+                for lane, count in stats["lanes"].items()
+            ))
+
     def stop(self, *__):
         """Stop a running runner"""
         self._stop = True
@@ -120,13 +178,17 @@ class BotogramRunner:
         upd_commands = multiprocessing.Queue()
 
         # Boot up the IPC process
-        ipc_process = processes.IPCProcess(None, self._ipc_server)
+        ipc_process = processes.IPCProcess(None, self._ipc_server,
+                                           self._rate_limiters,
+                                           self._workers_count,
+                                           self._chat_order,
+                                           self._priorities)
         ipc_process.start()
         self._ipc_process = ipc_process
 
         # And boot the client
         # This will wait until the IPC server is started
-        ipc_info = (self.ipc_port, self.ipc_auth_key)
+        ipc_info = (self.ipc_address, self.ipc_auth_key)
         while True:
             try:
                 self.ipc = ipc.IPCClient(*ipc_info)
@@ -136,17 +198,37 @@ class BotogramRunner:
 
         # Boot up all the worker processes
         for i in range(self._workers_count):
-            worker = processes.WorkerProcess(ipc_info, self._bots)
+            if self._async_workers:
+                from . import asyncworker
+                worker = asyncworker.AsyncWorkerProcess(ipc_info, self._bots,
+                                                        self._concurrency,
+                                                        self._prefetch)
+            else:
+                worker = processes.WorkerProcess(ipc_info, self._bots,
+                                                 self._prefetch)
             worker.start()
 
             self._worker_processes.append(worker)
 
         # Boot up all the updater processes
-        for bot in self._bots.values():
-            updater = processes.UpdaterProcess(ipc_info, bot, upd_commands)
+        if self._webhook is not None:
+            updater = processes.WebhookProcess(ipc_info, self._bots,
+                                               self._webhook,
+                                               self._webhook_url,
+                                               upd_commands)
             updater.start()
 
-            self._updater_processes[id] = updater
+            self._updater_processes["webhook"] = updater
+        else:
+            for bot in self._bots.values():
+                updater = processes.UpdaterProcess(ipc_info, bot,
+                                                   upd_commands,
+                                                   self._polling_timeout,
+                                                   self._polling_limit,
+                                                   self._checkpoint_store)
+                updater.start()
+
+                self._updater_processes[bot._bot_id] = updater
 
         return upd_commands
 
@@ -159,7 +241,13 @@ class BotogramRunner:
         for i in range(len(self._updater_processes)):
             to_updaters.put("stop")
         for process in self._updater_processes.values():
-            process.join()
+            # An updater waiting for a long polling request to end can be
+            # killed safely, since the updates it would receive are not
+            # confirmed to Telegram yet
+            process.join(UPDATERS_SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join()
         self._updaters_processes = {}
 
         # Here, we tell each worker to shut down, and then we join it
@@ -168,6 +256,15 @@ class BotogramRunner:
             worker.join()
         self._worker_processes = []
 
+        # Checkpoint the updates processed after the updaters stopped
+        if self._checkpoint_store is not None and self._webhook is None:
+            for bot in self._bots.values():
+                checkpoint = self._checkpoint_store.load(bot)
+                acked = self.ipc.command("jobs.collect_acked", bot._bot_id)
+                if checkpoint is not None and acked:
+                    checkpoint.processed(acked)
+                    self._checkpoint_store.save(bot, checkpoint)
+
         # And finally we stop the IPC process
         self.ipc.command("__stop__", self._ipc_stop_key)
         self._ipc_process.join()
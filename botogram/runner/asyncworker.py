@@ -0,0 +1,130 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+# This module uses async/await, so it's imported only when the asynchronous
+# workers are enabled, keeping botogram importable on Python 3.4
+
+import asyncio
+import concurrent.futures
+import functools
+
+from . import ipc
+from . import processes
+
+
+class AsyncWorkerProcess(processes.WorkerProcess):
+    """This process will execute multiple updates concurrently"""
+
+    name = "AsyncWorker"
+
+    def __init__(self, ipc_info, bots, concurrency, prefetch=10):
+        super().__init__(None, bots, concurrency, prefetch)
+
+        # Hooks run in multiple threads, sharing a few connections to the IPC
+        # server (for example for the shared memory)
+        self.ipc = ipc.IPCClientPool(*ipc_info)
+
+    def setup(self, bots, concurrency, prefetch=10):
+        super().setup(bots, prefetch)
+        self.concurrency = concurrency
+
+    def loop(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._process_jobs(loop))
+        finally:
+            loop.close()
+
+    async def _process_jobs(self, loop):
+        """Keep up to self.concurrency jobs running at the same time"""
+        # Jobs are fetched by a single thread, while the hooks are executed in
+        # a thread pool: this way the sync hooks keep working unchanged, and
+        # the time spent waiting for the network overlaps
+        fetcher = concurrent.futures.ThreadPoolExecutor(1)
+        reporter = concurrent.futures.ThreadPoolExecutor(1)
+        executor = concurrent.futures.ThreadPoolExecutor(self.concurrency)
+        free = self.concurrency
+        has_room = asyncio.Event()
+        has_room.set()
+        running = set()
+
+        # The processed jobs are reported by a separate thread, since the
+        # fetcher might be waiting for new jobs: while a batch is being sent,
+        # the next one is collected
+        reporting = set()
+
+        def report():
+            if self.done and not reporting:
+                batch, self.done = self.done, []
+                future = loop.run_in_executor(reporter, self.ipc.command,
+                                              "jobs.done", batch)
+                reporting.add(future)
+                future.add_done_callback(reported)
+
+        def reported(future):
+            reporting.discard(future)
+            report()
+
+        def job_done(job, future):
+            nonlocal free
+            running.discard(future)
+            free += 1
+            has_room.set()
+
+            receipt = processes._receipt_of(job)
+            if receipt is not None:
+                self.done.append(receipt)
+                report()
+
+        try:
+            while True:
+                # Don't request new jobs if there is no room to run them
+                await has_room.wait()
+
+                try:
+                    jobs_list = await loop.run_in_executor(
+                        fetcher, self.ipc.command, "jobs.get",
+                        (self._id, min(free, self.prefetch), []),
+                    )
+                except InterruptedError:
+                    continue
+
+                if jobs_list == "__stop__":
+                    break
+
+                for job in jobs_list:
+                    future = loop.run_in_executor(executor, self._run_job, job)
+                    running.add(future)
+                    future.add_done_callback(functools.partial(job_done, job))
+
+                free -= len(jobs_list)
+                if not free:
+                    has_room.clear()
+
+            # Let the jobs still running finish before stopping
+            if running:
+                await asyncio.wait(running)
+            while reporting:
+                await asyncio.wait(reporting)
+        finally:
+            self.stop = True
+            fetcher.shutdown()
+            executor.shutdown()
+            reporter.shutdown()
@@ -0,0 +1,111 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import collections
+import hashlib
+import os
+import pickle
+
+
+class Checkpoint:
+    """The updates received by a bot and not processed yet"""
+
+    def __init__(self, window=1000):
+        self.offset = -1
+        self.pending = collections.OrderedDict()
+
+        # The IDs of the latest processed updates are remembered, so they
+        # aren't processed twice if Telegram sends them again
+        self.window = window
+        self._processed = collections.deque()
+        self._processed_ids = set()
+
+    def is_known(self, update_id):
+        """Check if an update was already received"""
+        return update_id in self.pending or update_id in self._processed_ids
+
+    def received(self, updates):
+        """Add the received updates, and return the new ones"""
+        result = []
+        for update in updates:
+            update_id = update["update_id"]
+            self.offset = max(self.offset, update_id)
+            if self.is_known(update_id):
+                continue
+
+            self.pending[update_id] = update
+            result.append(update)
+
+        return result
+
+    def processed(self, update_ids):
+        """Mark some updates as processed"""
+        for update_id in update_ids:
+            if self.pending.pop(update_id, None) is None:
+                continue
+
+            self._processed.append(update_id)
+            self._processed_ids.add(update_id)
+
+            if len(self._processed) > self.window:
+                self._processed_ids.discard(self._processed.popleft())
+
+
+class CheckpointStore:
+    """Base class for the storages of the checkpoints"""
+
+    def load(self, bot):
+        """Load the checkpoint of a bot, or None if there isn't one"""
+        raise NotImplementedError
+
+    def save(self, bot, checkpoint):
+        """Save the checkpoint of a bot"""
+        raise NotImplementedError
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Store the checkpoints in a directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, bot):
+        """Get the path of the checkpoint of a bot"""
+        # The token is hashed, since it shouldn't be stored in clear text
+        key = hashlib.sha256(bot.api.token.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, "botogram-%s.checkpoint" % key)
+
+    def load(self, bot):
+        try:
+            with open(self._path(bot), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, bot, checkpoint):
+        path = self._path(bot)
+
+        # Replace the file atomically, so a crash while writing it doesn't
+        # corrupt the previous checkpoint
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
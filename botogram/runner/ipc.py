@@ -20,20 +20,40 @@
 
 import os
 import select
+import shutil
 import socket
 import random
 import struct
 import pickle
 import hashlib
+import tempfile
+import threading
 
 import logbook
 
 
-PACKET_LENGTH_SECTION_SIZE = 4
-READ_MAX_CHUNK = 4096
+# Each packet starts with the length of the pickled data and the number of
+# out-of-band buffers, followed by the length of each buffer
+PACKET_HEADER = struct.Struct("!IH")
+BUFFER_LENGTH = struct.Struct("!Q")
+READ_BUFFER_SIZE = 65536
+MAX_READ_BUFFER_SIZE = 16 * 1024 * 1024
+WRITE_MAX_CHUNKS = 512
 PORTS_RANGE = 49152, 65535
 MAX_CONNECT_TRIES = 20
 
+# Connections shared by the threads of a process, and the commands which can
+# wait on the server for a long time, which get a connection of their own
+POOL_SIZE = 8
+BLOCKING_COMMANDS = ("jobs.get", "shared.lock_acquire")
+
+# Unix sockets are faster, but they're not available everywhere
+USE_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+# Out-of-band buffers are supported only since pickle protocol 5
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+OUT_OF_BAND_BUFFERS = PICKLE_PROTOCOL >= 5
+
 
 class IPCError(Exception):
     pass
@@ -55,7 +75,23 @@ class IPCServer:
         self.stop_key = hashlib.sha1(os.urandom(64)).hexdigest()
 
         self.stop = False
-        self.port, self.conn = self._get_connection()
+        self._directory = None
+        if USE_UNIX_SOCKETS:
+            self.address, self.conn = self._get_unix_connection()
+        else:
+            self.address, self.conn = self._get_connection()
+
+    def _get_unix_connection(self):
+        """Create a new server connection on an Unix socket"""
+        # The socket is created in a private directory, so other users can't
+        # even try to connect to it
+        self._directory = tempfile.mkdtemp(prefix="botogram-")
+        path = os.path.join(self._directory, "ipc.sock")
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+
+        return path, sock
 
     def _get_connection(self):
         """Create a new server connection"""
@@ -98,6 +134,9 @@ class IPCServer:
         read_from = [self.conn]
         needs_authentication = []
 
+        # Each connection reads the packets in its own buffer
+        buffers = {}
+
         self.conn.listen(5)
         while not self.stop:
 
@@ -113,17 +152,20 @@ class IPCServer:
                 # If the connection we can read is the server one, accept the
                 # new connection and add it to the read_from list
                 if conn is self.conn:
-                    new_conn, addr = conn.accept()
+                    new_conn, _ = conn.accept()
+                    _set_nodelay(new_conn)
                     needs_authentication.append(new_conn)
                     read_from.append(new_conn)
+                    buffers[new_conn] = bytearray(READ_BUFFER_SIZE)
 
-                    self.logger.debug("New IPC connection from %s:%s" % addr)
+                    self.logger.debug("New IPC connection")
                 else:
                     try:
-                        request = read_packet(conn)
+                        request = read_packet(conn, buffers[conn])
                     # If the socket is broken, remove the connection
                     except EOFError:
                         read_from.remove(conn)
+                        del buffers[conn]
                         try:
                             conn.shutdown(socket.SHUT_RDWR)
                         except OSError:
@@ -184,6 +226,9 @@ class IPCServer:
                 pass
             conn.close()
 
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
     def process(self, conn, request):
         """Process a single request"""
         command = request["command"]
@@ -209,9 +254,17 @@ class IPCServer:
 class IPCClient:
     """Client for the Inter-Process Communication"""
 
-    def __init__(self, port, auth_key):
-        self.conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.conn.connect(("localhost", port))
+    def __init__(self, address, auth_key):
+        # Unix sockets are identified by their path, TCP ones by their port
+        if isinstance(address, str):
+            self.conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.conn.connect(address)
+        else:
+            self.conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.conn.connect(("localhost", address))
+            _set_nodelay(self.conn)
+
+        self._buffer = bytearray(READ_BUFFER_SIZE)
 
         self.command("__authenticate__", auth_key)
 
@@ -223,7 +276,7 @@ class IPCClient:
         except BrokenPipeError:
             raise IPCServerCrashedError("The IPC server just crashed")
 
-        response = read_packet(self.conn)
+        response = read_packet(self.conn, self._buffer)
         if response["ok"]:
             return response["data"]
 
@@ -238,64 +291,175 @@ class IPCClient:
         self.conn.close()
 
 
-def _read_from_socket(conn, length):
-    """Read a chunk of data from a connection"""
-    chunks = []
-    remaining = length
-    while remaining > 0:
-        # Read a maximum of READ_MAX_CHUNK each iteration
-        chunk = remaining
-        if chunk > READ_MAX_CHUNK:
-            chunk = READ_MAX_CHUNK
+class IPCClientPool:
+    """IPC client which shares a few connections between many threads"""
+
+    def __init__(self, address, auth_key, size=POOL_SIZE):
+        self.address = address
+        self.auth_key = auth_key
+        self.size = size
+
+        # Each connection runs a single command at a time, so at most size
+        # commands are sent at once, and the others wait for a free slot
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._idle_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Connections can't be shared between processes anyway
+        return {"address": self.address, "auth_key": self.auth_key,
+                "size": self.size}
 
+    def __setstate__(self, state):
+        self.__init__(state["address"], state["auth_key"], state["size"])
+
+    def command(self, command, data):
+        """Send a command to the IPC server"""
+        # Commands blocking on the server don't take a slot: a lock holder
+        # must always be able to release the lock its waiters are stuck on
+        blocking = command in BLOCKING_COMMANDS
+        if not blocking:
+            self._slots.acquire()
+        try:
+            with self._idle_lock:
+                client = self._idle.pop() if self._idle else None
+            if client is None:
+                client = IPCClient(self.address, self.auth_key)
+
+            # The connection is reused only if the server handled the command,
+            # even if it failed
+            broken = True
+            try:
+                result = client.command(command, data)
+                broken = False
+            except IPCServerCrashedError:
+                raise
+            except IPCError:
+                broken = False
+                raise
+            finally:
+                if broken:
+                    client.close()
+                else:
+                    self._release(client)
+
+            return result
+        finally:
+            if not blocking:
+                self._slots.release()
+
+    def _release(self, client):
+        """Keep a connection for the next commands, if there is room"""
+        with self._idle_lock:
+            if len(self._idle) < self.size:
+                self._idle.append(client)
+                return
+        client.close()
+
+    def close(self):
+        """Close all the idle connections to the IPC server"""
+        with self._idle_lock:
+            for client in self._idle:
+                client.close()
+            self._idle = []
+
+
+def _set_nodelay(conn):
+    """Send small packets immediately on TCP connections"""
+    if conn.family == socket.AF_INET:
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def _read_from_socket(conn, view):
+    """Fill a buffer with data read from a connection"""
+    while view:
         # In Python 3.4, when the process received a signal every system call
         # is interrupted, so it's better to retry sending the data instead of
         # crashing when someone signals the process
         try:
-            resp = conn.recv(chunk)
+            received = conn.recv_into(view)
         except InterruptedError:
             continue
 
-        if len(resp) == 0:
+        if received == 0:
             raise EOFError("Broken socket!")
 
-        chunks.append(resp)
-        remaining -= len(resp)
+        view = view[received:]
 
-    return b''.join(chunks)
 
+def _write_on_socket(conn, chunks):
+    """Write some chunks of data on a connection"""
+    chunks = [memoryview(chunk).cast("B") for chunk in chunks]
 
-def _write_on_socket(conn, data):
-    """Write a chunk of data on a connection"""
-    remaining = len(data)
-    while remaining > 0:
+    # Vectored writes aren't available everywhere
+    if not hasattr(conn, "sendmsg"):
+        conn.sendall(b"".join(chunks))
+        return
+
+    while chunks:
         # In Python 3.4, when the process received a signal every system call
         # is interrupted, so it's better to retry sending the data instead of
         # crashing when someone signals the process
         try:
-            sent = conn.send(data[len(data) - remaining:])
+            sent = conn.sendmsg(chunks[:WRITE_MAX_CHUNKS])
         except InterruptedError:
             continue
 
         if sent == 0:
             raise EOFError("Broken socket!")
 
-        remaining -= sent
+        # Remove the data already sent from the chunks
+        while sent:
+            if sent >= len(chunks[0]):
+                sent -= len(chunks.pop(0))
+            else:
+                chunks[0] = chunks[0][sent:]
+                sent = 0
 
 
-def read_packet(conn):
+def read_packet(conn, buffer=None):
     """Read a packet from a connection"""
-    size_raw = _read_from_socket(conn, PACKET_LENGTH_SECTION_SIZE)
-    size = struct.unpack("I", size_raw)[0]
-
-    result_raw = _read_from_socket(conn, size)
-    return pickle.loads(result_raw)
+    header = bytearray(PACKET_HEADER.size)
+    _read_from_socket(conn, memoryview(header))
+    size, buffers_count = PACKET_HEADER.unpack(header)
+
+    lengths = bytearray(BUFFER_LENGTH.size * buffers_count)
+    _read_from_socket(conn, memoryview(lengths))
+
+    # The provided buffer is reused, avoiding to allocate memory for each
+    # packet: if it's too small it grows, unless it would become huge
+    if buffer is None or size > MAX_READ_BUFFER_SIZE:
+        buffer = bytearray(size)
+    elif len(buffer) < size:
+        buffer.extend(bytes(size - len(buffer)))
+    data = memoryview(buffer)[:size]
+    _read_from_socket(conn, data)
+
+    # Out-of-band buffers are read in their own memory, since the unpickled
+    # objects might reference them
+    buffers = []
+    for (length,) in BUFFER_LENGTH.iter_unpack(lengths):
+        oob = bytearray(length)
+        _read_from_socket(conn, memoryview(oob))
+        buffers.append(oob)
+
+    if OUT_OF_BAND_BUFFERS:
+        return pickle.loads(data, buffers=buffers)
+    return pickle.loads(data)
 
 
 def write_packet(conn, data):
     """Write a packet to a connection"""
-    pickled = pickle.dumps(data)
-    size = struct.pack("I", len(pickled))
-
-    _write_on_socket(conn, size)
-    _write_on_socket(conn, pickled)
+    buffers = []
+    if OUT_OF_BAND_BUFFERS:
+        pickled = pickle.dumps(data, PICKLE_PROTOCOL,
+                               buffer_callback=buffers.append)
+        buffers = [buffer.raw() for buffer in buffers]
+    else:
+        pickled = pickle.dumps(data, PICKLE_PROTOCOL)
+
+    header = PACKET_HEADER.pack(len(pickled), len(buffers))
+    lengths = b"".join(BUFFER_LENGTH.pack(len(buf)) for buf in buffers)
+
+    # Everything is sent at once, without copying the buffers
+    _write_on_socket(conn, [header, lengths, pickled] + buffers)
@@ -20,109 +20,372 @@
 
 import collections
 import hashlib
+import time
+
+from .. import objects
+
+
+# Chats not queued yet are assigned to the least busy shard when theirs has
+# this many jobs. The shards aren't bounded, since the next jobs of a queued
+# chat must stay in its shard to keep their order
+SHARD_SPILLOVER_JOBS = 1000
+
+# Jobs are processed by priority, depending on their kind, but jobs waiting
+# for more than MAX_LANE_WAIT seconds are processed before the newer ones
+LANES = ("high", "normal", "low")
+DEFAULT_PRIORITIES = {
+    "callback_query": "high",
+    "inline_query": "high",
+}
+MAX_LANE_WAIT = 5
+
+
+# Kinds of updates containing a message, and so a chat
+_MESSAGE_KINDS = ("message", "edited_message", "channel_post",
+                  "edited_channel_post")
 
 
 def _is_inline_update(job):
     """This returns true if the job contains an inline update"""
-    if not job.metadata.get('update'):
-        return False
-    return job.metadata["update"].inline_query
+    update = job.metadata.get("update")
+    return update is not None and "inline_query" in update
 
 
-def _inline_assign_worker(update, workers_number):
+def _inline_assign_worker(inline_query, workers_number):
     """Internal assignment of workers for handling inline updates"""
     # The same query from the same sender will be handled by the same worker
     # this will avoid pagination issues
-    return (update.inline_query.sender.id +
-            int(hashlib.md5(update.inline_query.query.encode())
+    return (inline_query["from"]["id"] +
+            int(hashlib.md5(inline_query["query"].encode())
                 .hexdigest()[-3:], 16)) % workers_number
 
 
+def _update_chat_id(update):
+    """Get the ID of the chat of a raw update, if any"""
+    for kind in _MESSAGE_KINDS:
+        if kind in update:
+            return update[kind]["chat"]["id"]
+
+    # Callbacks of the inline messages don't have a chat
+    if "callback_query" in update:
+        message = update["callback_query"].get("message")
+        if message is not None:
+            return message["chat"]["id"]
+
+
+def _job_chat(job):
+    """Get the chat a job is related to, if any"""
+    update = job.metadata.get("update")
+    if update is None:
+        return None
+
+    chat_id = _update_chat_id(update)
+    if chat_id is None:
+        return None
+    return job.bot_id, chat_id
+
+
+def _job_kind(job):
+    """Get the kind of a job, used to choose its priority"""
+    if "task" in job.metadata:
+        return "timers"
+
+    update = job.metadata.get("update")
+    if update is not None:
+        for kind in objects.Update.optional:
+            if kind in update:
+                return kind
+
+
 class JobsCommands:
     """This object will manage the IPC jobs.* commands"""
 
-    def __init__(self):
-        self.queue = collections.deque()
+    def __init__(self, workers=1, chat_order=False, priorities=None):
+        # Jobs are queued in a lane for each priority
+        self.priorities = dict(DEFAULT_PRIORITIES)
+        if priorities is not None:
+            self.priorities.update(priorities)
+        for lane in self.priorities.values():
+            if lane not in LANES:
+                raise ValueError("Invalid priority: %s" % lane)
+        self._lanes_jobs = [0] * len(LANES)
+
+        # Jobs any worker can process are queued in shared FIFOs, while the
+        # ones assigned to a specific worker are queued in its own FIFO
+        self._lanes = [collections.deque() for _ in LANES]
+        self._affinity = [collections.deque() for _ in range(workers)]
         self.waiting = dict()
 
-        self._seen_workers = list()
+        self._seen_workers = set()
+
+        # If the updates of each chat must be processed in order, they're
+        # queued per chat, and each chat has at most one running job. Chats
+        # ready to be processed are sharded between the workers by their ID
+        self.chat_order = chat_order
+        self.workers = workers
+        self._chats = {}
+        self._chats_shard = {}
+        self._running_chats = set()
+        self._ready_lanes = {}
+        self._shards = [[collections.deque() for _ in LANES]
+                        for _ in range(workers)]
+        self._shards_jobs = [0] * workers
+
+        # Updates processed by the workers, until the updaters collect them
+        self.acked = collections.defaultdict(list)
 
         self.stop = False
 
+    def _queued(self):
+        """Get the number of queued jobs"""
+        return sum(self._lanes_jobs)
+
+    def _assigned_worker(self, job):
+        """Get the worker a job is assigned to, if any"""
+        if _is_inline_update(job):
+            inline_query = job.metadata["update"]["inline_query"]
+            return _inline_assign_worker(inline_query, self.workers)
+
+    def _blocked(self):
+        """Check if some jobs are waiting for their chat to be processed"""
+        return sum(self._shards_jobs) > 0
+
+    def _share(self):
+        """Get how many queued jobs a single worker can take"""
+        # Don't let a single worker take all the queued jobs, leaving the
+        # other ones without anything to do
+        workers = max(len(self._seen_workers), 1)
+        return -(-self._queued() // workers)
+
     def _put(self, job):
         """Internal implementation of putting a job into the queue"""
-        # Directly send the job to the processes wanting it
-
-        if len(self.waiting) > 0:
-            if _is_inline_update(job):
-                update = job.metadata["update"]
-                worker_id = _inline_assign_worker(update,
-                                                  len(self._seen_workers))
-                if worker_id not in self.waiting:
-                    self.queue.appendleft(job)
-                    return
+        job.lane = LANES.index(self.priorities.get(_job_kind(job), "normal"))
+        job.queued_at = time.monotonic()
+        self._lanes_jobs[job.lane] += 1
+
+        chat = _job_chat(job) if self.chat_order else None
+        if chat is None:
+            worker = self._assigned_worker(job)
+            if worker is None:
+                self._lanes[job.lane].append(job)
             else:
-                worker_id = list(self.waiting)[0]
-            try:
-                self.waiting[worker_id](job)
+                self._affinity[worker].append(job)
+            return
+
+        if chat not in self._chats:
+            shard = chat[1] % self.workers
+            if self._shards_jobs[shard] >= SHARD_SPILLOVER_JOBS:
+                shard = min(range(self.workers),
+                            key=self._shards_jobs.__getitem__)
+
+            self._chats[chat] = collections.deque()
+            self._chats_shard[chat] = shard
+
+        shard = self._chats_shard[chat]
+        self._chats[chat].append(job)
+        self._shards_jobs[shard] += 1
+
+        # The chat is ready only if it isn't already waiting or running
+        if len(self._chats[chat]) == 1 and chat not in self._running_chats:
+            self._shards[shard][job.lane].append(chat)
+            self._ready_lanes[chat] = job.lane
+
+    def _requeue(self, jobs):
+        """Put back some jobs taken from the queue"""
+        for job in reversed(jobs):
+            self._lanes_jobs[job.lane] += 1
+
+            if job.chat is None:
+                worker = self._assigned_worker(job)
+                if worker is None:
+                    self._lanes[job.lane].appendleft(job)
+                else:
+                    self._affinity[worker].appendleft(job)
+                continue
+
+            shard = self._chats_shard[job.chat]
+            self._running_chats.discard(job.chat)
+            self._chats[job.chat].appendleft(job)
+            self._shards_jobs[shard] += 1
+
+            # The chat is now ready with the lane of this job
+            lane = self._ready_lanes.get(job.chat)
+            if lane is not None:
+                self._shards[shard][lane].remove(job.chat)
+            self._shards[shard][job.lane].appendleft(job.chat)
+            self._ready_lanes[job.chat] = job.lane
+
+    def _sources(self, shards):
+        """Get the queues to take jobs from, by priority"""
+        sources = []
+        for lane in range(len(LANES)):
+            sources.append((self._lanes[lane], None))
+            for shard in shards:
+                sources.append((self._shards[shard][lane], shard))
+        return sources
+
+    def _take_next(self, sources):
+        """Take the next job from the sources, following the priorities"""
+        # Usually the job with the highest priority is taken, but if jobs
+        # with a lower priority waited too much the oldest one is taken
+        now = time.monotonic()
+        chosen = chosen_job = None
+        for queue, shard in sources:
+            if not queue:
+                continue
+
+            job = queue[0] if shard is None else self._chats[queue[0]][0]
+            if chosen is None:
+                chosen, chosen_job = (queue, shard), job
+            elif now - job.queued_at > MAX_LANE_WAIT:
+                if job.queued_at < chosen_job.queued_at:
+                    chosen, chosen_job = (queue, shard), job
+
+        if chosen is None:
+            return None
+
+        queue, shard = chosen
+        if shard is not None:
+            chat = queue.popleft()
+            del self._ready_lanes[chat]
+            self._chats[chat].popleft()
+            self._shards_jobs[shard] -= 1
+            self._running_chats.add(chat)
+            chosen_job.chat = chat
+        else:
+            queue.popleft()
+
+        self._lanes_jobs[chosen_job.lane] -= 1
+        return chosen_job
+
+    def _take(self, worker_id, count, steal=True):
+        """Take up to count jobs the worker is allowed to process"""
+        taken = []
+        own = worker_id % self.workers
+
+        # Jobs assigned to this worker go first, since no one else can
+        # process them
+        affinity = self._affinity[own]
+        while affinity and len(taken) < count:
+            job = affinity.popleft()
+            self._lanes_jobs[job.lane] -= 1
+            taken.append(job)
+
+        # Idle workers steal the ready chats of the busiest shards
+        shards = [own] if self.chat_order else []
+        if self.chat_order and steal:
+            shards += sorted((shard for shard in range(self.workers)
+                              if shard != own), reverse=True,
+                             key=self._shards_jobs.__getitem__)
+
+        sources = self._sources(shards)
+        while len(taken) < count:
+            job = self._take_next(sources)
+            if job is None:
+                break
+            taken.append(job)
+
+        return taken
+
+    def _wake_up(self):
+        """Send the queued jobs to the waiting workers"""
+        share = self._share()
+
+        # Workers steal the jobs of other shards only after all the waiting
+        # workers received the jobs of their own shard
+        for steal in False, True:
+            for worker_id in list(self.waiting):
+                waiting_reply, count = self.waiting[worker_id]
+                jobs = self._take(worker_id, min(count, share), steal)
+                if not jobs:
+                    continue
+
                 del self.waiting[worker_id]
-            except EOFError:
-                pass
-            else:
-                return
-        self.queue.appendleft(job)
+                try:
+                    waiting_reply(jobs)
+                except (EOFError, OSError):
+                    self._requeue(jobs)
+
+        # Stop the waiting workers if no more jobs are coming
+        if self.stop and not self._blocked():
+            for waiting_reply, _ in self.waiting.values():
+                waiting_reply("__stop__")
+            self.waiting = dict()
 
     def bulk_put(self, jobs, reply):
         """Put multiple jobs in the queue"""
         if self.stop:
             reply("No more jobs accepted", ok=False)
+            return
 
         # Add each provided job
         for job in jobs:
             self._put(job)
+        self._wake_up()
         reply(None)
 
-    def get(self, worker_id, reply):
-        """Get a job from the queue"""
-        def _reply_with(_job_id):
-            """Reply to a jobs.get request with a job"""
-            _job = self.queue[_job_id]
-            del self.queue[_job_id]
-            reply(_job)
+    def get(self, data, reply):
+        """Get some jobs from the queue"""
+        worker_id, count, done = data
+        self._done(done)
 
-        if worker_id not in self._seen_workers:
-            self._seen_workers.append(worker_id)
+        self._seen_workers.add(worker_id)
 
         # If there is something in the queue return it, else append the request
-        # to the new jobs' waiting deque
-        if len(self.queue) > 0:
-            for job_id in range(len(self.queue)):
-                job = self.queue[job_id]
-                # If the job is an inline update assign it
-                # to the designated worker
-                if _is_inline_update(job):
-                    assigned_worker = _inline_assign_worker(
-                        job.metadata["update"],
-                        len(self._seen_workers)
-                    )
-                    if worker_id == assigned_worker:
-                        return _reply_with(job_id)
-                    continue
-                return _reply_with(job_id)
-
-        if self.stop:
+        # to the new jobs' waiting list
+        jobs = self._take(worker_id, min(count, self._share()))
+        if jobs:
+            reply(jobs)
+        elif self.stop and not self._blocked():
             reply("__stop__")
+        else:
+            self.waiting[worker_id] = reply, count
+
+        # The processed jobs might allow other workers to run the next jobs
+        # of their chats
+        if done:
+            self._wake_up()
+
+    def _done(self, receipts):
+        """Mark some jobs as processed"""
+        for bot_id, update_id, chat in receipts:
+            if update_id is not None:
+                self.acked[bot_id].append(update_id)
+
+            if chat is not None:
+                self._running_chats.discard(chat)
+                if self._chats[chat]:
+                    lane = self._chats[chat][0].lane
+                    self._shards[self._chats_shard[chat]][lane].append(chat)
+                    self._ready_lanes[chat] = lane
+                else:
+                    del self._chats[chat]
+                    del self._chats_shard[chat]
+
+    def done(self, receipts, reply):
+        """Mark some jobs as processed"""
+        self._done(receipts)
+        self._wake_up()
+        reply(None)
 
-        self.waiting[worker_id] = reply
+    def collect_acked(self, bot_id, reply):
+        """Return the updates of a bot processed since the last call"""
+        reply(self.acked.pop(bot_id, []))
+
+    def stats(self, _, reply):
+        """Return some statistics about the queue"""
+        reply({
+            "lanes": dict(zip(LANES, self._lanes_jobs)),
+            "running_chats": len(self._running_chats),
+            "waiting_workers": len(self.waiting),
+        })
 
     def shutdown(self, _, reply):
         """Shutdown the queue"""
         self.stop = True
 
         # Stop all the waiting workers
-        if len(self.waiting) > 0:
-            for worker in self.waiting:
-                self.waiting[worker]("__stop__")
+        self._wake_up()
 
         reply(None)
 
@@ -135,6 +398,13 @@ class Job:
         self.func = func
         self.metadata = metadata
 
+        # The chat the job is processed for, if it's processed in order
+        self.chat = None
+
+        # The queue lane of the job, and when it was queued
+        self.lane = None
+        self.queued_at = None
+
     def process(self, bots):
         bot = bots[self.bot_id]
         return self.func(bot, self.metadata)
@@ -142,11 +412,10 @@ class Job:
 
 def process_update(bot, metadata):
     """Process an update received from Telegram"""
-    update = metadata["update"]
-
-    # Restore the removed API object
-    update.set_api(bot.api)
-    bot.process(update)
+    # Updates are sent to the workers as the JSON received from Telegram, so
+    # they're parsed only here, and the bot gives them its API when it
+    # processes them
+    bot.process(objects.Update(metadata["update"]))
 
 
 def process_task(bot, metadata):
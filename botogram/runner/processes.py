@@ -23,12 +23,16 @@ import os
 import traceback
 import queue
 import signal
+import threading
 
 import logbook
 
 from . import jobs
 from . import shared
 from . import ipc
+from . import checkpoints
+from . import ratelimit
+from . import webhook
 from .. import api
 from .. import updates as updates_module
 
@@ -103,19 +107,29 @@ class IPCProcess(BaseProcess):
 
     name = "IPC"
 
-    def setup(self, ipc):
+    def setup(self, ipc, rate_limiters, workers=1, chat_order=False,
+              priorities=None):
         self.ipc_server = ipc
 
         # Setup the jobs commands
-        self.jobs_commands = jobs.JobsCommands()
+        self.jobs_commands = jobs.JobsCommands(workers, chat_order,
+                                               priorities)
         ipc.register_command("jobs.bulk_put", self.jobs_commands.bulk_put)
         ipc.register_command("jobs.get", self.jobs_commands.get)
+        ipc.register_command("jobs.done", self.jobs_commands.done)
+        ipc.register_command("jobs.collect_acked",
+                             self.jobs_commands.collect_acked)
+        ipc.register_command("jobs.stats", self.jobs_commands.stats)
         ipc.register_command("jobs.shutdown", self.jobs_commands.shutdown)
 
         # Setup the shared commands
         self.shared_commands = shared.SharedMemoryCommands()
         ipc.register_command("shared.get", self.shared_commands.get)
         ipc.register_command("shared.list", self.shared_commands.list)
+        ipc.register_command("shared.cache_get",
+                             self.shared_commands.cache_get)
+        ipc.register_command("shared.cache_update",
+                             self.shared_commands.cache_update)
         ipc.register_command("shared.lock_acquire",
                              self.shared_commands.lock_acquire)
         ipc.register_command("shared.lock_release",
@@ -127,6 +141,11 @@ class IPCProcess(BaseProcess):
         ipc.register_command("shared.lock_export",
                              self.shared_commands.lock_export)
 
+        # Setup the rate limiting commands
+        self.ratelimit_commands = ratelimit.RateLimitCommands(rate_limiters)
+        ipc.register_command("ratelimit.reserve",
+                             self.ratelimit_commands.reserve)
+
     def before_start(self):
         # Start the shared memory manager
         self.shared_commands.start()
@@ -154,24 +173,42 @@ class WorkerProcess(BaseProcess):
         self._id = type(self).counter
         type(self).counter += 1
 
-    def setup(self, bots):
+    def setup(self, bots, prefetch=10):
         self.bots = bots
+        self.prefetch = prefetch
+
+        # The processed jobs are reported with the next request
+        self.done = []
 
     def loop(self):
-        # Request a new job
+        # Request some new jobs
         try:
-            job = self.ipc.command("jobs.get", self._id)
+            jobs_list = self.ipc.command("jobs.get", (self._id, self.prefetch,
+                                                      self.done))
         except InterruptedError:
             # This return acts as a continue
             return
+        self.done = []
 
         # If the job is None, stop the worker
-        if job == "__stop__":
+        if jobs_list == "__stop__":
             self.stop = True
             return
 
-        # Run the wanted job
-        job.process(self.bots)
+        # Run the wanted jobs
+        for job in jobs_list:
+            self._run_job(job)
+
+            receipt = _receipt_of(job)
+            if receipt is not None:
+                self.done.append(receipt)
+
+    def _run_job(self, job):
+        """Run a single job"""
+        try:
+            job.process(self.bots)
+        except Exception:
+            traceback.print_exc()
 
 
 class UpdaterProcess(BaseProcess):
@@ -179,15 +216,53 @@ class UpdaterProcess(BaseProcess):
 
     name = "Updater"
 
-    def setup(self, bot, commands):
+    def setup(self, bot, commands, polling_timeout=30, polling_limit=100,
+              checkpoint_store=None):
         self.bot = bot
         self.bot_id = bot._bot_id
         self.commands = commands
+        self.fetching = False
+
+        # Resume from the updates received by the previous run
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint = None
+        if checkpoint_store is not None:
+            self.checkpoint = checkpoint_store.load(bot)
+            if self.checkpoint is None:
+                self.checkpoint = checkpoints.Checkpoint()
+
+        last_id = -1 if self.checkpoint is None else self.checkpoint.offset
+        self.fetcher = updates_module.UpdatesFetcher(
+            bot, max_timeout=polling_timeout, limit=polling_limit,
+            last_id=last_id, raw=True,
+        )
 
-        self.fetcher = updates_module.UpdatesFetcher(bot)
+    def before_start(self):
+        # Allow the runner to terminate the process, without losing the
+        # updates already fetched
+        signal.signal(signal.SIGTERM, self.on_terminate)
+
+        # Process again the updates not processed by the previous run
+        if self.checkpoint is not None and self.checkpoint.pending:
+            self.logger.debug("Processing %s updates received before the "
+                              "restart" % len(self.checkpoint.pending))
+            self.submit_updates(list(self.checkpoint.pending.values()))
+
+    def on_terminate(self, *__):
+        """Stop the process when the runner terminates it"""
+        self.stop = True
+
+        # The updates being fetched aren't confirmed to Telegram yet, so the
+        # request can be interrupted: otherwise the process stops as soon as
+        # the fetched updates are submitted
+        if self.fetching:
+            raise KeyboardInterrupt
 
     def should_stop(self):
         """Check if the process should stop"""
+        if self.stop:
+            return True
+
         try:
             command = self.commands.get(False)
         except queue.Empty:
@@ -203,8 +278,25 @@ class UpdaterProcess(BaseProcess):
         if self.should_stop():
             return
 
+        # Updates are checkpointed until the workers process them, so they
+        # aren't lost if the runner crashes
+        timeout = None
+        if self.checkpoint is not None:
+            acked = self.ipc.command("jobs.collect_acked", self.bot_id)
+            if acked:
+                self.checkpoint.processed(acked)
+                self.checkpoint_store.save(self.bot, self.checkpoint)
+
+            # Don't wait too much to collect the processed updates
+            if self.checkpoint.pending:
+                timeout = self.fetcher.min_timeout
+
+        self.fetching = True
         try:
-            updates = self.fetcher.fetch()
+            # The process might have been terminated in the meantime
+            if self.stop:
+                return
+            updates = self.fetcher.fetch(timeout)
         except updates_module.AnotherInstanceRunningError:
             self.handle_another_instance()
             return
@@ -213,19 +305,30 @@ class UpdaterProcess(BaseProcess):
             self.logger.debug("Exception type: %s" % e.__class__.__name__)
             self.logger.debug("Exception content: %s" % str(e))
             return
+        finally:
+            self.fetching = False
 
         if not updates:
             return
 
+        if self.checkpoint is not None:
+            updates = self.checkpoint.received(updates)
+            self.checkpoint_store.save(self.bot, self.checkpoint)
+
+        self.submit_updates(updates)
+
+    def submit_updates(self, updates):
+        """Send some updates to the workers"""
         result = []
         for update in updates:
-            update.set_api(None)
             data = {
                 "update": update,
+                "ack": self.checkpoint is not None,
             }
             result.append(jobs.Job(self.bot_id, jobs.process_update, data))
 
-        self.ipc.command("jobs.bulk_put", result)
+        if result:
+            self.ipc.command("jobs.bulk_put", result)
 
     def handle_another_instance(self):
         """Code run when another instance of the bot is running"""
@@ -244,5 +347,63 @@ class UpdaterProcess(BaseProcess):
                              "working again")
 
 
+class WebhookProcess(UpdaterProcess):
+    """This process will receive the updates sent by Telegram"""
+
+    name = "Webhook"
+
+    def setup(self, bots, address, url, commands):
+        self.bots = bots
+        self.address = address
+        self.url = url
+        self.commands = commands
+
+        # Telegram sends the updates again until the server receives them,
+        # so there is nothing to checkpoint
+        self.checkpoint = None
+
+        self.server = None
+        self.submit_lock = None
+
+    def before_start(self):
+        super().before_start()
+
+        self.submit_lock = threading.Lock()
+
+        self.server = webhook.WebhookServer(self.bots.values(), self.address,
+                                            self.submit)
+        # Don't block forever, so the process can check if it should stop
+        self.server.timeout = 1
+
+        # Register the webhook only when the server is ready to receive
+        if self.url is not None:
+            self.server.register(self.url)
+
+    def submit(self, jobs_list):
+        # Requests are handled by multiple threads, sharing the IPC connection
+        with self.submit_lock:
+            self.ipc.command("jobs.bulk_put", jobs_list)
+
+    def loop(self):
+        # This allows to control the process
+        if self.should_stop():
+            return
+
+        self.server.handle_request()
+
+    def after_stop(self):
+        self.server.server_close()
+
+
+def _receipt_of(job):
+    """Get what to report after a job is processed, if anything"""
+    update_id = None
+    if job.metadata.get("ack"):
+        update_id = job.metadata["update"]["update_id"]
+
+    if update_id is not None or job.chat is not None:
+        return job.bot_id, update_id, job.chat
+
+
 def _ignore_signal(*__):
     pass
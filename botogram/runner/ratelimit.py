@@ -0,0 +1,55 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import multiprocessing
+
+from .. import ratelimit
+
+
+class RateLimitCommands:
+    """Definition of IPC commands for the rate limiters"""
+
+    def __init__(self, limiters):
+        # The buckets live only in the IPC process, so the limits are global
+        # to all the processes of the runner
+        self._limiters = limiters
+
+    def reserve(self, data, reply):
+        """Reserve a message, and reply with how long to wait"""
+        limiter_id, chat_id = data
+        reply(self._limiters[limiter_id].reserve(chat_id))
+
+
+class MultiprocessingRateLimiter(ratelimit.RateLimiter):
+    """This is a multiprocessing-ready rate limiter"""
+
+    def __init__(self, limiter_id):
+        self._limiter_id = limiter_id
+
+    def __reduce__(self):
+        return rebuild_limiter, (self._limiter_id,)
+
+    def reserve(self, chat_id, now=None):
+        ipc = multiprocessing.current_process().ipc
+        return ipc.command("ratelimit.reserve", (self._limiter_id, chat_id))
+
+
+def rebuild_limiter(limiter_id):
+    return MultiprocessingRateLimiter(limiter_id)
@@ -19,8 +19,23 @@
 #   DEALINGS IN THE SOFTWARE.
 
 import collections
+import collections.abc
 import multiprocessing
 import multiprocessing.managers
+import pickle
+import threading
+import time
+
+
+# Seconds the workers can use their copy of a cached shared memory without
+# checking if it was changed, with the eventual consistency
+CACHE_MAX_STALENESS = 1
+
+# Seconds the copies can be used without checking them, for each consistency
+CACHE_CONSISTENCIES = {
+    "read-your-writes": 0,
+    "eventual": CACHE_MAX_STALENESS,
+}
 
 
 class OverrideableDict(dict):
@@ -34,6 +49,11 @@ class SharedMemoryCommands:
         self._memories = {}
         self._manager = multiprocessing.managers.SyncManager()
 
+        # Memories cached by the workers are stored here instead, with a
+        # version increased by each change so the workers know if their copy
+        # is outdated
+        self._cached = {}
+
         self._locks = set()
         self._locks_queues = {}
 
@@ -53,7 +73,43 @@ class SharedMemoryCommands:
 
     def list(self, memory_id, reply):
         """Get all the shared memories available"""
-        reply(list(self._memories.keys()))
+        reply(list(self._memories.keys()) + list(self._cached.keys()))
+
+    def _cached_memory(self, memory_id):
+        """Get the version and the content of a cached memory"""
+        new = False
+        if memory_id not in self._cached:
+            self._cached[memory_id] = [0, {}]
+            new = True
+
+        return self._cached[memory_id], new
+
+    def cache_get(self, args, reply):
+        """Get a cached memory, if the worker's copy is outdated"""
+        memory_id, version = args
+        (current, data), new = self._cached_memory(memory_id)
+
+        # Don't send the content again if the worker already has it
+        if version == current:
+            data = None
+        reply((current, data, new))
+
+    def cache_update(self, args, reply):
+        """Change some keys of a cached memory"""
+        memory_id, version, changed, deleted = args
+        memory, __ = self._cached_memory(memory_id)
+
+        # If other workers changed the memory in the meantime the whole
+        # content is sent back, otherwise the worker applies the changes to
+        # its copy by itself
+        outdated = memory[0] != version
+
+        memory[1].update(changed)
+        for key in deleted:
+            memory[1].pop(key, None)
+        memory[0] += 1
+
+        reply((memory[0], memory[1] if outdated else None))
 
     def lock_acquire(self, lock_id, reply):
         """Acquire a lock"""
@@ -73,14 +129,15 @@ class SharedMemoryCommands:
         if lock_id not in self._locks:
             return reply(None)
 
-        self._locks.remove(lock_id)
-
         # If there are processes waiting for this lock, wake up one of them
+        # and give the lock to it, otherwise the lock is free
         if lock_id in self._locks_queues:
             self._locks_queues[lock_id].pop()(None)
             # And clear up the queue if it's empty
             if not len(self._locks_queues[lock_id]):
                 del self._locks_queues[lock_id]
+        else:
+            self._locks.remove(lock_id)
 
         reply(None)
 
@@ -151,5 +208,155 @@ class MultiprocessingDriver:
         return result
 
 
+# Values of these types can't be changed in place, so they aren't copied
+_IMMUTABLE_TYPES = (int, float, str, bytes, bool, type(None))
+
+
+def _copy(value):
+    """Copy a value of a cached memory, as if it was sent by the IPC"""
+    if type(value) in _IMMUTABLE_TYPES:
+        return value
+    return pickle.loads(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+class CachedMemory(collections.abc.MutableMapping):
+    """Worker's copy of a shared memory, with the changes sent to the IPC"""
+
+    def __init__(self, driver, memory_id):
+        self._driver = driver
+        self._memory_id = memory_id
+
+        self._data = {}
+        self._version = None
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return rebuild_cached_memory, (self._driver, self._memory_id)
+
+    def __repr__(self):
+        return "<CachedMemory %r: %r>" % (self._memory_id, self._data)
+
+    def _sync(self):
+        """Fetch the changes made by the other workers"""
+        with self._lock:
+            version, data, new = self._driver._command("shared.cache_get", (
+                self._memory_id, self._version,
+            ))
+            if data is not None:
+                self._data = data
+            self._version = version
+            self._synced_at = time.monotonic()
+
+        return new
+
+    def _change(self, changed, deleted=()):
+        """Change the memory both locally and in the IPC process"""
+        with self._lock:
+            version, data = self._driver._command("shared.cache_update", (
+                self._memory_id, self._version, changed, deleted,
+            ))
+            if data is None:
+                self._data.update((key, _copy(value))
+                                  for key, value in changed.items())
+                for key in deleted:
+                    self._data.pop(key, None)
+            else:
+                self._data = data
+            self._version = version
+
+    # Reads are served by the local copy, copying the values which could be
+    # changed in place: like with the other drivers, changing them doesn't
+    # change the shared memory, and it must not change the local copy either
+
+    def __getitem__(self, key):
+        return _copy(self._data[key])
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        # Other threads might change the copy while it's iterated
+        return iter(list(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        if key not in self._data:
+            return default
+        return _copy(self._data[key])
+
+    # Writes are sent to the IPC process right away
+
+    def __setitem__(self, key, value):
+        self._change({key: value})
+
+    def __delitem__(self, key):
+        if key not in self._data:
+            raise KeyError(key)
+        self._change({}, (key,))
+
+    def update(self, *args, **kwargs):
+        self._change(dict(*args, **kwargs))
+
+    def clear(self):
+        self._change({}, tuple(self._data))
+
+
+class CachedMultiprocessingDriver(MultiprocessingDriver):
+    """Multiprocessing driver keeping a copy of the memories in each worker"""
+
+    def __init__(self, consistency="read-your-writes"):
+        if consistency not in CACHE_CONSISTENCIES:
+            raise ValueError("Unknown shared memory consistency: %s (use %s)"
+                             % (consistency, ", ".join(CACHE_CONSISTENCIES)))
+
+        super().__init__()
+        self.consistency = consistency
+        self._max_staleness = CACHE_CONSISTENCIES[consistency]
+
+    def __reduce__(self):
+        return rebuild_cached_driver, (self.consistency,)
+
+    def get(self, memory_id):
+        memory = self._memories.get(memory_id)
+        if memory is None:
+            memory = self._memories.setdefault(memory_id,
+                                               CachedMemory(self, memory_id))
+
+        # The copy is checked only when the memory is requested, so hooks
+        # read it locally
+        elif time.monotonic() - memory._synced_at < self._max_staleness:
+            return memory, False
+
+        return memory, memory._sync()
+
+    def lock_acquire(self, lock_id):
+        super().lock_acquire(lock_id)
+
+        # The changes made by who held the lock before must be seen by the
+        # hook which acquired it, even if the copies aren't old yet
+        for memory in list(self._memories.values()):
+            memory._sync()
+
+    def import_data(self, data):
+        for memory_id, content in data["storage"].items():
+            memory, __ = self.get(memory_id)
+            memory.update(content)
+
+        if len(data["locks"]):
+            self._command("shared.lock_import", data["locks"])
+
+
 def rebuild_driver():
     return MultiprocessingDriver()
+
+
+def rebuild_cached_driver(consistency):
+    return CachedMultiprocessingDriver(consistency)
+
+
+def rebuild_cached_memory(driver, memory_id):
+    memory, __ = driver.get(memory_id)
+    return memory
@@ -0,0 +1,122 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import hmac
+import http.server
+import json
+import socket
+import socketserver
+
+import logbook
+
+from . import jobs
+from .. import updates
+
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Seconds to wait for a client to send its request before dropping it
+REQUEST_TIMEOUT = 10
+
+
+def secrets(bot):
+    """Get the secret path and token of the bot's webhook"""
+    # Those are derived from the API token, so they don't change between
+    # restarts, and they can't be guessed by who doesn't know the token
+    mac = hmac.new(bot.api.token.encode("utf-8"), b"botogram webhook",
+                   hashlib.sha256).hexdigest()
+    return "/" + mac[:32], mac[32:]
+
+
+class WebhookHandler(http.server.BaseHTTPRequestHandler):
+    """Handle the updates sent by Telegram"""
+
+    # Slow or idle clients are disconnected instead of holding a thread
+    timeout = REQUEST_TIMEOUT
+
+    def do_POST(self):
+        if self.path not in self.server.bots:
+            return self._reply(404)
+        bot, token = self.server.bots[self.path]
+
+        # Be sure the request was made by Telegram
+        received = self.headers.get(SECRET_TOKEN_HEADER, "")
+        if not hmac.compare_digest(received, token):
+            return self._reply(403)
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            update = json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            return self._reply(400)
+        except socket.timeout:
+            self.close_connection = True
+            return
+
+        # The update is parsed by the workers, so only check it has an ID
+        if not isinstance(update, dict) or \
+                not isinstance(update.get("update_id"), int):
+            return self._reply(400)
+
+        self.server.submit([jobs.Job(bot._bot_id, jobs.process_update, {
+            "update": update,
+        })])
+        self._reply(200)
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        self.server.logger.debug(format % args)
+
+
+class WebhookServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """HTTP server receiving the updates of multiple bots"""
+
+    # Each request is handled by its own thread, so a slow client doesn't
+    # delay the updates sent by Telegram
+    daemon_threads = True
+
+    def __init__(self, bots, address, submit):
+        self.logger = logbook.Logger("botogram webhook")
+
+        # The submit function receives the list of the new jobs, and it's
+        # called by multiple threads at once
+        self.submit = submit
+
+        self.bots = {}
+        for bot in bots:
+            path, token = secrets(bot)
+            self.bots[path] = bot, token
+
+        super(WebhookServer, self).__init__(address, WebhookHandler)
+
+    def register(self, base_url):
+        """Tell Telegram to send the updates to this server"""
+        for path, (bot, token) in self.bots.items():
+            bot.api.call("setWebhook", {
+                "url": base_url.rstrip("/") + path,
+                "secret_token": token,
+                "drop_pending_updates": not bot.process_backlog,
+                "allowed_updates": updates.allowed_updates(bot),
+            })
@@ -23,23 +23,12 @@ import re
 from . import utils
 
 
-_markdown_re = re.compile(r".*("
-                          r"\*(.*)\*|"
-                          r"_(.*)_|"
-                          r"\[(.*)\]\((.*)\)|"
-                          r"`(.*)`|"
-                          r"```(.*)```"
-                          r").*")
-
-_html_re = re.compile(r".*("
-                      r"<b>(.*)<\/b>|"
-                      r"<strong>(.*)<\/strong>|"
-                      r"<i>(.*)<\/i>|"
-                      r"<em>(.*)<\/em>|"
-                      r"<a\shref=\"(.*)\">(.*)<\/a>|"
-                      r"<code>(.*)<\/code>|"
-                      r"<pre>(.*)<\/pre>"
-                      r").*")
+# The syntaxes are detected by looking at the delimiters in the message
+# once, instead of using regexes with nested wildcards, which backtrack a lot
+# on long messages
+_markdown_tokens_re = re.compile(r"[*_`\[)]|\]\(")
+_html_tokens_re = re.compile(r"<(/?)(b|strong|i|em|code|pre)>|"
+                             r"<a\shref=(?=\")|\">|</a>")
 
 
 def is_markdown(message):
@@ -47,14 +36,54 @@ def is_markdown(message):
     # Don't mark part of URLs or email addresses as Markdown
     message = utils.strip_urls(message)
 
-    return bool(_markdown_re.match(message.replace("\n", "")))
+    # Markdown is detected if the message contains two of the same text
+    # delimiter, or "[" followed by "](" and then by ")"
+    seen = set()
+    link = 0
+    for token in _markdown_tokens_re.finditer(message.replace("\n", "")):
+        char = token.group()
+        if char in seen:
+            return True
+        if char == "[":
+            link = max(link, 1)
+        elif char == "](":
+            link = 2 if link else 0
+        elif char == ")":
+            if link == 2:
+                return True
+        else:
+            seen.add(char)
+    return False
 
 
 def is_html(message):
     """Check if a string is actually HTML"""
     # Here URLs are not stripped because no sane URL contains HTML tags in it,
     # and for a few cases the speed penality is not worth
-    return bool(_html_re.match(message.replace("\n", "")))
+
+    # HTML is detected if the message contains an opening tag followed by the
+    # closing one, or a link with "<a href=\"", "\">" and "</a>" in order
+    # The quote of "<a href=\"" isn't part of its token, since it can also
+    # be the start of the "\">" of a previous link
+    opened = set()
+    link_start = None
+    link_text = False
+    for token in _html_tokens_re.finditer(message.replace("\n", "")):
+        closing, tag = token.group(1, 2)
+        if tag is not None:
+            if not closing:
+                opened.add(tag)
+            elif tag in opened:
+                return True
+        elif token.group() == "</a>":
+            if link_text:
+                return True
+        elif token.group() == "\">":
+            if link_start is not None and token.start() > link_start:
+                link_text = True
+        elif link_start is None:
+            link_start = token.end()
+    return False
 
 
 def guess_syntax(message, provided):
@@ -20,6 +20,23 @@
 
 from . import objects
 from . import api
+from . import callbacks
+from . import inline
+from . import messages
+
+
+# Hook chains used by the default update processors: if a chain is empty, the
+# related updates won't be processed, so there is no need to receive them
+_default_processors_chains = {
+    messages.process_message: "messages",
+    messages.process_edited_message: "messages_edited",
+    messages.process_channel_post: "channel_post",
+    messages.process_channel_post_edited: "channel_post_edited",
+    messages.process_poll_update: "poll_updates",
+    callbacks.process: "callbacks",
+    inline.process: "inline",
+    inline.inline_feedback_process: "inline_feedback",
+}
 
 
 class FetchError(api.APIError):
@@ -35,25 +52,57 @@ class AnotherInstanceRunningError(FetchError):
                            "pooling or webhook active")
 
 
+def allowed_updates(bot):
+    """Get the kinds of updates the bot is able to process"""
+    chains = bot._chains if hasattr(bot, "_chains") else bot.freeze()._chains
+
+    result = []
+    for kind, processor in bot._update_processors.items():
+        # Custom processors may not use hooks at all, so their updates are
+        # always received
+        chain = _default_processors_chains.get(processor)
+        if chain is None or chains[chain]:
+            result.append(kind)
+
+    return result
+
+
 class UpdatesFetcher:
     """Logic for fetching updates"""
 
-    def __init__(self, bot):
+    def __init__(self, bot, min_timeout=1, max_timeout=30, limit=100,
+                 last_id=-1, raw=False):
         self._bot = bot
-        self._last_id = -1
+        self._last_id = last_id
         self._backlog_processed = False
 
-        # Don't treat backlog as backlog if bot.process_backlog is True
-        if bot.process_backlog:
+        # The long polling timeout doubles each time no updates are received,
+        # and it's reset as soon as there is some traffic
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._timeout = min_timeout
+
+        self.limit = limit
+        self.allowed_updates = allowed_updates(bot)
+
+        # Raw updates are returned as the JSON received from Telegram, without
+        # parsing them into objects
+        self.raw = raw
+
+        # Don't treat backlog as backlog if bot.process_backlog is True, or
+        # when resuming from the updates received by a previous run
+        if bot.process_backlog or last_id >= 0:
             self._backlog_processed = True
 
     def _fetch_updates(self, timeout):
         """Low level function to just fetch updates from Telegram"""
         try:
-            return self._bot.api.call("getUpdates", {
+            result = self._bot.api.call("getUpdates", {
                 "offset": self._last_id + 1,
                 "timeout": timeout,
-            }, expect=objects.Updates)
+                "limit": self.limit,
+                "allowed_updates": self.allowed_updates,
+            }, expect=None if self.raw else objects.Updates)
         except api.APIError as e:
             # Raise a specific exception if another instance is running
             if e.error_code == 409 and "conflict" in e.description.lower():
@@ -62,8 +111,22 @@ class UpdatesFetcher:
         except ValueError:
             raise FetchError("Got an invalid response from Telegram!")
 
-    def fetch(self, timeout=1):
+        if self.raw:
+            return result["result"]
+        return result
+
+    def _update_id(self, update):
+        """Get the ID of a fetched update"""
+        if self.raw:
+            return update["update_id"]
+        return update.update_id
+
+    def fetch(self, timeout=None):
         """Fetch the latest updates"""
+        adaptive = timeout is None
+        if adaptive:
+            timeout = self._timeout
+
         if not self._backlog_processed:
             # Just erase all the previous messages
             last = self._bot.api.call("getUpdates", {
@@ -81,11 +144,15 @@ class UpdatesFetcher:
 
         updates = self._fetch_updates(timeout)
 
+        if adaptive:
+            if updates:
+                self._timeout = self.min_timeout
+            else:
+                self._timeout = min(self.max_timeout, self._timeout * 2)
+
         # If there are no updates just ignore this block
-        try:
-            self._last_id = updates[-1].update_id
-        except IndexError:
-            pass
+        if updates:
+            self._last_id = self._update_id(updates[-1])
 
         return updates
 
@@ -106,10 +173,8 @@ class UpdatesFetcher:
                 continue
 
             # Update the last_id
-            try:
-                self._last_id = updates[-1].update_id
-            except IndexError:
-                pass
+            if updates:
+                self._last_id = self._update_id(updates[-1])
 
             # Don't count requests with new updates, since they don't tell if
             # another instance is running, they only make noise
@@ -23,4 +23,4 @@
 from .deprecations import deprecated, DeprecatedAttributes, warn
 from .strings import strip_urls, usernames_in
 from .startup import get_language, configure_logger
-from .calls import wraps, CallLazyArgument, call
+from .calls import wraps, CallLazyArgument, call, call_plan
@@ -19,6 +19,7 @@
 #   DEALINGS IN THE SOFTWARE.
 
 import inspect
+import weakref
 
 import functools
 
@@ -50,31 +51,64 @@ class CallLazyArgument:
         return self.loader()
 
 
-def call(func, **available):
-    """Call a function with a dynamic set of arguments"""
-    # Get the correct function signature
-    # _botogram_original_signature contains the signature used before wrapping
-    # a function with @utils.wraps, so the arguments gets resolved correctly
-    if hasattr(func, "_botogram_original_signature"):
-        signature = func._botogram_original_signature
-    else:
-        signature = inspect.signature(func)
+class CallPlan:
+    """The arguments a function needs, resolved from its signature"""
+
+    def __init__(self, func):
+        # Get the correct function signature
+        # _botogram_original_signature contains the signature used before
+        # wrapping a function with @utils.wraps, so the arguments gets
+        # resolved correctly
+        if hasattr(func, "_botogram_original_signature"):
+            signature = func._botogram_original_signature
+        else:
+            signature = inspect.signature(func)
+
+        self.parameters = tuple(
+            (parameter.name, parameter.default is inspect.Parameter.empty)
+            for parameter in signature.parameters.values()
+        )
+        self.names = frozenset(name for name, _ in self.parameters)
+
+    def call(self, func, available):
+        """Call the function with the arguments it needs"""
+        kwargs = {}
+
+        for name, required in self.parameters:
+            try:
+                arg = available[name]
+            except KeyError:
+                if not required:
+                    continue
 
-    kwargs = {}
+                raise TypeError("botogram doesn't know what to provide for %s"
+                                % name) from None
 
-    for parameter in signature.parameters.values():
-        if parameter.name not in available:
-            if parameter.default is not inspect.Parameter.empty:
-                continue
+            # If the argument is lazily loaded wake him up
+            if isinstance(arg, CallLazyArgument):
+                arg = arg.load()
 
-            raise TypeError("botogram doesn't know what to provide for %s"
-                            % parameter.name)
+            kwargs[name] = arg
 
-        # If the argument is lazily loaded wake him up
-        arg = available[parameter.name]
-        if hasattr(arg, "_botogram_call_lazy_argument"):
-            arg = arg.load()
+        return func(**kwargs)
 
-        kwargs[parameter.name] = arg
 
-    return func(**kwargs)
+# Plans are cached as long as their functions exist
+_plans = weakref.WeakKeyDictionary()
+
+
+def call_plan(func):
+    """Get the call plan of a function"""
+    try:
+        return _plans[func]
+    except KeyError:
+        plan = _plans[func] = CallPlan(func)
+        return plan
+    except TypeError:
+        # Some callables can't be weakly referenced
+        return CallPlan(func)
+
+
+def call(func, **available):
+    """Call a function with a dynamic set of arguments"""
+    return call_plan(func).call(func, available)
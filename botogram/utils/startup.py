@@ -22,23 +22,33 @@ import os
 import sys
 import gettext
 
-import pkg_resources
 import logbook
 
 
 # This small piece of global state will track if logbook was configured
 _logger_configured = False
 
+# The translations are loaded only once for each language, and then they're
+# shared by all the bots
+_languages = {}
+_languages_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "i18n",
+)
+
 
 def get_language(lang):
     """Get the GNUTranslations instance of a specific language"""
-    path = pkg_resources.resource_filename("botogram", "i18n/%s.mo" % lang)
+    if lang in _languages:
+        return _languages[lang]
+
+    path = os.path.join(_languages_dir, "%s.mo" % lang)
     if not os.path.exists(path):
         raise ValueError('Language "%s" is not supported by botogram' % lang)
 
     with open(path, "rb") as f:
         gt = gettext.GNUTranslations(f)
 
+    _languages[lang] = gt
     return gt
 
 
@@ -19,20 +19,46 @@
 #   DEALINGS IN THE SOFTWARE.
 
 import re
+import string
 
 
 # URLs regex created by http://twitter.com/imme_emosol
 
 _username_re = re.compile(r"\@([a-zA-Z0-9_]{5}[a-zA-Z0-9_]*)")
 _command_re = re.compile(r"^\/[a-zA-Z0-9_]+(\@[a-zA-Z0-9_]{5}[a-zA-Z0-9_]*)?$")
-_email_re = re.compile(r"[a-zA-Z0-9_\.\+\-]+\@[a-zA-Z0-9_\.\-]+\.[a-zA-Z]+")
+_email_local_chars = frozenset(string.ascii_letters + string.digits + "_.+-")
+_email_domain_re = re.compile(r"[a-zA-Z0-9_\.\-]+\.[a-zA-Z]+")
 _url_re = re.compile(r"https?://(-\.)?([^\s/?\.#]+\.?)+(/[^\s]*)?")
 
 
+def _strip_emails(text):
+    """Strip the email addresses from a string"""
+    # A single regex would scan long words again from each of their
+    # characters, so the addresses are searched starting from the @
+    result = []
+    last = 0
+    at = text.find("@")
+    while at != -1:
+        start = at
+        while start > last and text[start - 1] in _email_local_chars:
+            start -= 1
+
+        domain = _email_domain_re.match(text, at + 1)
+        if start < at and domain is not None:
+            result.append(text[last:start])
+            last = domain.end()
+            at = text.find("@", last)
+        else:
+            at = text.find("@", at + 1)
+
+    result.append(text[last:])
+    return "".join(result)
+
+
 def strip_urls(string):
     """Strip URLs and emails from a string"""
     string = _url_re.sub("", string)
-    string = _email_re.sub("", string)
+    string = _strip_emails(string)
     return string
 
 
@@ -234,6 +234,10 @@ def test(ctx):
 
     invoke.run("%s/bin/py.test tests" % env, pty=True)
 
+    # Run the tests with the lazy objects too, since they're enabled when
+    # botogram is imported
+    invoke.run("BOTOGRAM_LAZY_OBJECTS=1 %s/bin/py.test tests" % env, pty=True)
+
 
 #
 # Linting
@@ -41,7 +41,7 @@ def mock_req(request):
         request.addfinalizer(lambda: mocker.stop())
 
         for method, response in requests.items():
-            mocker.add("GET",
+            mocker.add("POST",
                        "https://api.telegram.org/bot"+API_KEY+"/"+method,
                        content_type="application/json",
                        body=json.dumps(response))
@@ -57,7 +57,7 @@ def api(request):
 @pytest.fixture()
 def bot(request):
     mocker = responses.RequestsMock()
-    mocker.add("GET", "https://api.telegram.org/bot"+API_KEY+"/getMe",
+    mocker.add("POST", "https://api.telegram.org/bot"+API_KEY+"/getMe",
                content_type="application/json", body=json.dumps({
                    "ok": True, "result": {"id": 1, "first_name": "test",
                    "username": "test_bot"}}))
@@ -18,11 +18,18 @@
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #   DEALINGS IN THE SOFTWARE.
 
+import asyncio
+import io
+import json
+
 import pytest
+import responses
 
 import botogram.api
 import botogram.objects
 
+import conftest
+
 
 def test_api_call(api, mock_req):
     # This will mock the requests the API will made
@@ -172,3 +179,117 @@ def test_unavailable_chats_take2(api, mock_req):
         api.call("forwardMessage", {"chat_id": 123})
     assert e.value.chat_id == 123
     assert e.value.reason == "chat_moved"
+
+
+def test_async_api_call(mock_req):
+    mock_req({
+        "getMe": {"ok": True, "result": {"id": 1, "first_name": "test"}},
+        "wrong": {"ok": False, "error_code": 123, "description": "test"},
+    })
+
+    api = botogram.api.AsyncTelegramAPI(conftest.API_KEY, concurrency=4)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        # Many requests can be in flight at the same time
+        results = loop.run_until_complete(asyncio.gather(*[
+            api.call("getMe", expect=botogram.objects.User)
+            for i in range(8)
+        ]))
+        assert all(result.id == 1 for result in results)
+
+        # Wrapped objects are bound to the sync API
+        assert results[0]._api is api.sync
+
+        with pytest.raises(botogram.api.APIError):
+            loop.run_until_complete(api.call("wrong"))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+        api.close()
+
+
+def test_api_retries(api, monkeypatch):
+    slept = []
+    monkeypatch.setattr(botogram.api.time, "sleep", slept.append)
+
+    url = "https://api.telegram.org/bot" + conftest.API_KEY + "/"
+    flood = json.dumps({
+        "ok": False, "error_code": 429, "description": "Too Many Requests",
+        "parameters": {"retry_after": 5},
+    })
+    server_error = json.dumps({
+        "ok": False, "error_code": 502, "description": "Bad Gateway",
+    })
+    ok = json.dumps({"ok": True, "result": {"id": 1, "first_name": "test"}})
+
+    with responses.RequestsMock() as mocker:
+        # Flood errors are retried after the provided amount of time
+        mocker.add("POST", url + "sendMessage", body=flood)
+        mocker.add("POST", url + "sendMessage", body=ok)
+        assert api.call("sendMessage", {"chat_id": 1})["ok"]
+        assert slept == [5]
+
+        # Server errors are retried with backoff only for idempotent methods
+        mocker.add("POST", url + "getMe", body=server_error)
+        mocker.add("POST", url + "getMe", body=ok)
+        assert api.call("getMe")["ok"]
+        assert 0.25 <= slept[1] <= 0.5
+
+        mocker.add("POST", url + "sendPhoto", body=server_error)
+        with pytest.raises(botogram.api.APIError):
+            api.call("sendPhoto", {"chat_id": 1})
+        assert len(slept) == 2
+
+    stats = api.retry_policy.stats()
+    assert stats["sendMessage"] == {
+        "calls": 1, "retries": 1, "failures": 0, "retry_time": 5,
+    }
+    assert stats["getMe"]["retries"] == 1
+    assert stats["sendPhoto"]["failures"] == 1
+
+
+def test_retry_policy_budget():
+    policy = botogram.api.RetryPolicy(max_retries=10, budget=2,
+                                      budget_ratio=0.5)
+    error = {"ok": False, "error_code": 500, "description": "Error"}
+
+    # Only the available budget can be spent in retries
+    assert policy.retry_delay("getMe", 0, error) is not None
+    assert policy.retry_delay("getMe", 1, error) is not None
+    assert policy.retry_delay("getMe", 2, error) is None
+
+    # And new calls earn new retries
+    assert policy.retry_delay("getChat", 0, error) is None
+    assert policy.retry_delay("getChat", 0, error) is not None
+
+    # The maximum number of retries is respected
+    policy = botogram.api.RetryPolicy(max_retries=1)
+    assert policy.retry_delay("getMe", 0, error) is not None
+    assert policy.retry_delay("getMe", 1, error) is None
+
+
+def test_api_request_body(api):
+    url = "https://api.telegram.org/bot" + conftest.API_KEY + "/"
+    ok = json.dumps({"ok": True, "result": True})
+    markup = {"inline_keyboard": [[{"text": "a", "callback_data": "b"}]]}
+
+    with responses.RequestsMock() as mocker:
+        mocker.add("POST", url + "sendMessage", body=ok)
+        mocker.add("POST", url + "sendPhoto", body=ok)
+
+        # Parameters are sent as JSON, with nested values encoded only once
+        api.call("sendMessage", {"chat_id": 1, "reply_markup": markup})
+        request = mocker.calls[0].request
+        assert request.url == url + "sendMessage"
+        assert json.loads(request.body) == {
+            "chat_id": 1, "reply_markup": markup,
+        }
+
+        # Files are uploaded with multipart, with nested values as JSON
+        api.call("sendPhoto", {"chat_id": 1, "reply_markup": markup},
+                 {"photo": io.BytesIO(b"photo")})
+        request = mocker.calls[1].request
+        assert request.headers["Content-Type"].startswith("multipart/")
+        assert json.dumps(markup).encode("utf-8") in request.body
@@ -20,6 +20,9 @@
 
 import copy
 
+import pytest
+import requests.exceptions
+
 import botogram.bot
 import botogram.components
 import botogram.utils
@@ -79,6 +82,32 @@ def test_bot_freeze(bot):
     assert bot == frozen
 
 
+def test_process_frozen_cache(bot, sample_update):
+    calls = []
+    component = botogram.components.Component()
+
+    @bot.process_message
+    def first(message):
+        calls.append("first")
+
+    # The frozen instance is reused until the bot changes
+    bot.process(sample_update)
+    frozen = bot._frozen_cache[1]
+    bot.process(sample_update)
+    assert bot._frozen_cache[1] is frozen
+    assert calls == ["first", "first"]
+
+    # Hooks added to the bot or to its components are used
+    bot.use(component)
+    component.add_process_message_hook(lambda: calls.append("component"))
+    bot.process(sample_update)
+    assert calls[2:] == ["first", "component"]
+
+    bot.about = "Changed"
+    bot.process(sample_update)
+    assert bot._frozen_cache[1].about == "Changed"
+
+
 def test_i18n_override(bot):
     default_message = botogram.utils.get_language("en") \
         .gettext("Use /help to get a list of all the commands.")
@@ -95,3 +124,66 @@ def test_i18n_override(bot):
 
     assert bot._("Use /help to get a list of all the commands.") \
         == default_message
+
+
+def test_languages_cache(bot):
+    # The translations are loaded only once, and shared between the bots
+    assert botogram.utils.get_language("en") is bot._lang_inst
+    assert botogram.utils.get_language("en") is bot.freeze()._lang_inst
+
+    with pytest.raises(ValueError):
+        botogram.utils.get_language("invalid")
+
+
+def test_unreachable_telegram():
+    class FakeAPI:
+        def __init__(self, error):
+            self.error = error
+
+        def call(self, *args, **kwargs):
+            raise self.error
+
+    # Connection errors stop the bot, while the other errors are raised
+    with pytest.raises(SystemExit):
+        botogram.bot.Bot(FakeAPI(requests.exceptions.ConnectionError()))
+    with pytest.raises(KeyError):
+        botogram.bot.Bot(FakeAPI(KeyError()))
+
+
+def test_text_matchers(bot, sample_update):
+    calls = []
+
+    @bot.message_equals("hello world")
+    def equals(message):
+        calls.append("equals")
+
+    @bot.message_contains("World", ignore_case=False, multiple=True)
+    def contains(message):
+        calls.append("contains")
+
+    @bot.message_matches(r"(\d+)", multiple=True)
+    def matches(matches):
+        calls.append(matches)
+
+    @bot.message_matches(r"(?P<word>[a-z]+)!")
+    def named(matches):
+        calls.append("named")
+
+    # Conditional references to the groups break when combined
+    @bot.message_matches(r"^(<)?hi(?(1)>)$")
+    def conditional(matches):
+        calls.append("conditional")
+
+    @bot.process_message
+    def process(message):
+        calls.append("process")
+
+    frozen = bot.freeze()
+    for text in ("Hello World", "World World 1 2", "1 2", "hi!", "<hi>",
+                 "nothing"):
+        sample_update.message.text = text
+        frozen.process(sample_update)
+
+    # The hooks are called in order, until one of them processes the message
+    assert calls == ["equals", "contains", "contains", "contains", ("1",),
+                     ("2",), "named", "conditional", "process"]
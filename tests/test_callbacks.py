@@ -23,7 +23,7 @@ import json
 import pytest
 
 from botogram.callbacks import Buttons, parse_callback_data, get_callback_data
-from botogram.callbacks import hashed_callback_name
+from botogram.callbacks import hashed_callback_name, CallbackSigner
 from botogram.components import Component
 from botogram.context import Context
 from botogram.crypto import TamperedMessageError
@@ -100,3 +100,20 @@ def test_parse_callback_data(bot, sample_update):
         hashed_callback_name("test_callback"),
         "data!"
     )
+
+
+def test_callback_signer(bot, sample_update):
+    c = sample_update.chat()
+
+    # The data signed by a signer is verified by the usual parsing
+    signer = CallbackSigner(bot, c)
+    for data in "first", "second", None:
+        raw = signer.callback_data("test_callback", data)
+        assert parse_callback_data(bot, c, raw) == (
+            hashed_callback_name("test_callback"), data,
+        )
+
+    # Signatures are valid only for the chat they were generated for
+    other = CallbackSigner(bot, None).callback_data("test_callback", "first")
+    with pytest.raises(TamperedMessageError):
+        parse_callback_data(bot, c, other)
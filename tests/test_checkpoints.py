@@ -0,0 +1,114 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import json
+import queue
+
+import responses
+
+import botogram.runner.checkpoints
+import botogram.runner.jobs
+import botogram.runner.processes
+import conftest
+
+
+def _updates(*ids):
+    return [{"update_id": id} for id in ids]
+
+
+def test_checkpoint():
+    checkpoint = botogram.runner.checkpoints.Checkpoint(window=2)
+
+    new = checkpoint.received(_updates(1, 2, 3))
+    assert [update["update_id"] for update in new] == [1, 2, 3]
+    assert checkpoint.offset == 3
+
+    # Updates received twice are ignored, both if they're still pending and
+    # if they were already processed
+    checkpoint.processed([1, 2])
+    assert list(checkpoint.pending) == [3]
+    assert checkpoint.received(_updates(1, 2, 3)) == []
+
+    # Only the latest processed updates are remembered
+    checkpoint.processed([3])
+    assert not checkpoint.is_known(1)
+    assert checkpoint.is_known(2)
+    assert checkpoint.is_known(3)
+
+
+def test_file_checkpoint_store(tmpdir, bot):
+    store = botogram.runner.checkpoints.FileCheckpointStore(str(tmpdir))
+    assert store.load(bot) is None
+
+    checkpoint = botogram.runner.checkpoints.Checkpoint()
+    checkpoint.received(_updates(1, 2))
+    checkpoint.processed([1])
+    store.save(bot, checkpoint)
+
+    loaded = store.load(bot)
+    assert loaded.offset == 2
+    assert list(loaded.pending) == [2]
+    assert loaded.is_known(1)
+
+    # The token isn't stored in clear text
+    assert len(tmpdir.listdir()) == 1
+    assert bot.api.token not in tmpdir.listdir()[0].basename
+
+
+def test_jobs_ack():
+    commands = botogram.runner.jobs.JobsCommands()
+    replies = []
+
+    commands.done([("bot", 1, None), ("bot", 2, None)], replies.append)
+    commands.done([("other", 3, None)], replies.append)
+
+    commands.collect_acked("bot", replies.append)
+    commands.collect_acked("bot", replies.append)
+    assert replies[-2:] == [[1, 2], []]
+
+
+def test_resume_from_checkpoint(tmpdir, frozenbot):
+    assert not frozenbot.process_backlog
+
+    store = botogram.runner.checkpoints.FileCheckpointStore(str(tmpdir))
+    checkpoint = botogram.runner.checkpoints.Checkpoint()
+    checkpoint.received(_updates(1, 2))
+    checkpoint.processed([1, 2])
+    store.save(frozenbot, checkpoint)
+
+    bodies = []
+
+    def get_updates(request):
+        bodies.append(json.loads(request.body.decode("utf-8")))
+        return 200, {}, json.dumps({"ok": True, "result": _updates(3)})
+
+    # The updates received while the runner was stopped aren't skipped, even
+    # if the bot doesn't process the backlog
+    updater = botogram.runner.processes.UpdaterProcess(
+        None, frozenbot, queue.Queue(), 30, 100, store,
+    )
+    with responses.RequestsMock() as mocker:
+        mocker.add_callback("POST", "https://api.telegram.org/bot" +
+                            conftest.API_KEY + "/getUpdates",
+                            callback=get_updates,
+                            content_type="application/json")
+        assert updater.fetcher.fetch() == _updates(3)
+
+    assert [body["offset"] for body in bodies] == [3]
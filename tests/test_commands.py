@@ -20,7 +20,11 @@
 
 import pickle
 
+import logbook
+
 import botogram.commands
+import botogram.components
+import botogram.hooks
 import botogram.decorators
 
 
@@ -133,3 +137,48 @@ def test_command_summary(bot):
     # Summary of a docstring with more than one lines
     func.__doc__ = "This is a\nlong test"
     assert cmd.summary == "This is a"
+
+
+def test_command_routing(bot, sample_update):
+    comp = botogram.components.Component("comp")
+    calls = []
+
+    @bot.command("test")
+    def test(args):
+        calls.append(("test", args))
+
+    @bot.command("other")
+    def other():
+        calls.append("other")
+
+    def comp_test():
+        calls.append("comp test")
+    comp.add_command("test", comp_test)
+
+    @bot.process_message
+    def process(message):
+        calls.append(message.text)
+
+    bot.use(comp)
+    frozen = bot.freeze()
+
+    # All the commands are looked up with a single hook
+    routers = [hook for hook in frozen._chains["messages"]
+               if isinstance(hook, botogram.hooks.CommandsRouter)]
+    assert len(routers) == 1
+
+    with logbook.TestHandler() as logs:
+        for text in ("/test@test_bot a\nb", "/test@other_bot", "/test2",
+                     "/other", "hi"):
+            sample_update.message.text = text
+            frozen.process(sample_update)
+
+    # The first hook of each command is called, and the messages not
+    # containing a command for the bot are processed by the next hooks
+    assert calls == [("test", ["a", "b"]), "/test@other_bot", "/test2",
+                     "other", "hi"]
+
+    # The logs tell which command hook processed the update
+    assert logs.has_debug("Update #1 was just processed by the other hook.")
+    assert not any("commands router" in record.message
+                   for record in logs.records)
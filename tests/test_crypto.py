@@ -20,6 +20,8 @@
 
 import pytest
 
+import botogram.crypto
+
 from botogram.crypto import generate_secret_key, get_hmac, sign_data
 from botogram.crypto import TamperedMessageError, verify_signature
 
@@ -34,6 +36,10 @@ def test_hmac(bot):
     expect = b'q\x06\x9c\xc1\xfa\xd1n\xe8\xef\x17\xf6\xd7Z\xb0G\x7f'
     assert get_hmac(bot, b'test data') == expect
 
+    # The HMAC keyed with the secret key is reused without being altered
+    assert get_hmac(bot, b'other data') != expect
+    assert get_hmac(bot, b'test data') == expect
+
     signed = sign_data(bot, b'test string')
     assert verify_signature(bot, signed) == b'test string'
 
@@ -43,3 +49,11 @@ def test_hmac(bot):
 
     with pytest.raises(TamperedMessageError):
         verify_signature(bot, b'a')
+
+
+def test_keyed_hmacs_cache():
+    # Only the HMACs of the latest bots are kept
+    for i in range(botogram.crypto.KEYED_HMACS_CACHE_SIZE + 10):
+        botogram.crypto._keyed_hmac("token%s" % i, "bot")
+    info = botogram.crypto._keyed_hmac.cache_info()
+    assert info.currsize == botogram.crypto.KEYED_HMACS_CACHE_SIZE
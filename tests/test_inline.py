@@ -17,7 +17,6 @@
 #   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #   DEALINGS IN THE SOFTWARE.
-import json
 import botogram
 from botogram.components import Component
 from botogram.objects.updates import Update
@@ -26,15 +25,11 @@ from botogram.runner.jobs import _inline_assign_worker
 
 
 def call_overwrite(*args):
-    for arg in args:
-        if type(arg) is dict:
-            if "results" in arg:
-                arg["results"] = json.loads(arg["results"])
     return args
 
 
-def update_inline(id_update, offset='', query=''):
-    return Update({
+def raw_update_inline(id_update, offset='', query=''):
+    return {
         'update_id': id_update,
         'inline_query': {
             'id': '123',
@@ -46,7 +41,11 @@ def update_inline(id_update, offset='', query=''):
             'query': query,
             'offset': offset
         }
-    })
+    }
+
+
+def update_inline(id_update, offset='', query=''):
+    return Update(raw_update_inline(id_update, offset, query))
 
 
 def expected_result_inline(old_offset=0):
@@ -79,11 +78,11 @@ def inline_default(bot):
 
 
 def test_worker_assignment():
-    update_1 = update_inline(1)
-    assert _inline_assign_worker(update_1, 5) == 4
-    update_2 = update_inline(2, offset='10',
-                             query='Test query with some unicode 🅱️🤯🥶')
-    assert _inline_assign_worker(update_2, 3) == 2
+    update_1 = raw_update_inline(1)
+    assert _inline_assign_worker(update_1['inline_query'], 5) == 4
+    update_2 = raw_update_inline(2, offset='10',
+                                 query='Test query with some unicode 🅱️🤯🥶')
+    assert _inline_assign_worker(update_2['inline_query'], 3) == 2
 
 
 def test_inline_hook(bot, mock_req):
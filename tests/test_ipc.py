@@ -0,0 +1,155 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import socket
+import threading
+import time
+
+import botogram.runner.ipc
+
+
+def test_packets():
+    first, second = socket.socketpair()
+    try:
+        data = {
+            "command": "test",
+            "data": [bytearray(b"a" * 100000), "text", 42],
+        }
+        big = {"text": "a" * 100000}
+        botogram.runner.ipc.write_packet(first, data)
+        botogram.runner.ipc.write_packet(first, {"small": True})
+
+        buffer = bytearray(1024)
+        assert botogram.runner.ipc.read_packet(second, buffer) == data
+        assert botogram.runner.ipc.read_packet(second, buffer) == {
+            "small": True,
+        }
+
+        # The buffer grows to fit the bigger packets, so it can be reused
+        for i in range(2):
+            thread = threading.Thread(target=botogram.runner.ipc.write_packet,
+                                      args=(first, big))
+            thread.start()
+            assert botogram.runner.ipc.read_packet(second, buffer) == big
+            assert len(buffer) > 100000
+            thread.join()
+    finally:
+        first.close()
+        second.close()
+
+
+def test_server_and_client():
+    server = botogram.runner.ipc.IPCServer()
+    server.register_command("echo", lambda data, reply: reply(data))
+
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    try:
+        # Wait until the server starts listening
+        while True:
+            try:
+                client = botogram.runner.ipc.IPCClient(server.address,
+                                                       server.auth_key)
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.01)
+
+        assert client.command("echo", "hello") == "hello"
+        assert client.command("echo", b"x" * 100000) == b"x" * 100000
+        client.command("__stop__", server.stop_key)
+        client.close()
+    finally:
+        thread.join()
+
+
+def test_client_pool(monkeypatch):
+    server = botogram.runner.ipc.IPCServer()
+    server.register_command("echo", lambda data, reply: reply(data))
+
+    # Lock acquisitions are answered only when the lock is released
+    waiters = []
+
+    def release(data, reply):
+        for waiter in waiters:
+            waiter(None)
+        reply(len(waiters))
+
+    server.register_command("shared.lock_acquire",
+                            lambda data, reply: waiters.append(reply))
+    server.register_command("release", release)
+
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    try:
+        while True:
+            try:
+                client = botogram.runner.ipc.IPCClient(server.address,
+                                                       server.auth_key)
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.01)
+
+        opened = []
+
+        class CountingClient(botogram.runner.ipc.IPCClient):
+            def __init__(self, *args):
+                super().__init__(*args)
+                opened.append(self)
+
+        monkeypatch.setattr(botogram.runner.ipc, "IPCClient", CountingClient)
+        pool = botogram.runner.ipc.IPCClientPool(server.address,
+                                                 server.auth_key, 2)
+
+        # Many threads share at most two connections
+        results = []
+
+        def echo(i):
+            results.append(pool.command("echo", i))
+
+        threads = [threading.Thread(target=echo, args=(i,))
+                   for i in range(20)]
+        for one in threads:
+            one.start()
+        for one in threads:
+            one.join()
+        assert sorted(results) == list(range(20))
+        assert len(opened) <= 2
+
+        # Waiting for a lock doesn't take a connection of the pool, so the
+        # lock can still be released
+        threads = [threading.Thread(target=pool.command,
+                                    args=("shared.lock_acquire", None))
+                   for i in range(3)]
+        for one in threads:
+            one.start()
+        while len(waiters) < 3:
+            time.sleep(0.01)
+        assert pool.command("release", None) == 3
+        for one in threads:
+            one.join()
+
+        # Only the idle connections are kept open
+        assert len(pool._idle) == 2
+        pool.close()
+
+        client.command("__stop__", server.stop_key)
+        client.close()
+    finally:
+        thread.join()
@@ -0,0 +1,260 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import botogram.objects
+import botogram.runner.jobs
+
+
+def _job(n):
+    return botogram.runner.jobs.Job("bot", None, {"n": n})
+
+
+def _numbers(jobs):
+    return sorted(job.metadata["n"] for job in jobs)
+
+
+def test_get_batch():
+    commands = botogram.runner.jobs.JobsCommands()
+    replies = []
+
+    # Workers waiting for jobs receive them as soon as they're queued
+    commands.get((0, 3, []), replies.append)
+    assert replies == []
+    commands.bulk_put([_job(i) for i in range(5)], replies.append)
+    assert _numbers(replies[0]) == [0, 1, 2]
+    assert replies[1] is None
+
+    commands.get((0, 3, []), replies.append)
+    assert _numbers(replies[2]) == [3, 4]
+
+
+def test_get_assigned_jobs():
+    commands = botogram.runner.jobs.JobsCommands(workers=2)
+    replies = []
+
+    # Find inline queries assigned to the second worker
+    assigned = []
+    sender = 0
+    while len(assigned) < 2:
+        update = {
+            "update_id": sender,
+            "inline_query": {
+                "id": str(sender),
+                "from": {"id": sender, "first_name": "test"},
+                "query": "test",
+                "offset": "",
+            },
+        }
+        worker = botogram.runner.jobs._inline_assign_worker(
+            update["inline_query"], 2,
+        )
+        if worker == 1:
+            assigned.append(botogram.runner.jobs.Job("bot", None, {
+                "update": update,
+            }))
+        sender += 1
+
+    commands.bulk_put(assigned + [_job(1), _job(2)], lambda _: None)
+
+    # Jobs assigned to other workers are skipped
+    commands.get((0, 10, []), replies.append)
+    assert _numbers(replies[0]) == [1, 2]
+    commands.get((1, 10, []), replies.append)
+    commands.get((1, 10, []), replies.append)
+    assert replies[1:] == [assigned[:1], assigned[1:]]
+
+
+def test_get_fairness():
+    commands = botogram.runner.jobs.JobsCommands()
+    replies = []
+
+    commands.get((0, 10, []), replies.append)
+    commands.get((1, 10, []), replies.append)
+    commands.bulk_put([_job(i) for i in range(6)], lambda _: None)
+
+    # The queued jobs are split between the waiting workers
+    assert len(replies[0]) == 3
+    assert len(replies[1]) == 3
+
+
+def test_get_acks_and_shutdown():
+    commands = botogram.runner.jobs.JobsCommands()
+    replies = []
+
+    # Processed updates are acknowledged with the next request
+    commands.get((0, 10, [("bot", 1, None), ("bot", 2, None)]),
+                 replies.append)
+    commands.collect_acked("bot", replies.append)
+    assert replies == [[1, 2]]
+
+    commands.shutdown(None, replies.append)
+    assert replies[1:] == ["__stop__", None]
+
+    commands.get((0, 10, []), replies.append)
+    assert replies[-1] == "__stop__"
+
+
+def _chat_job(chat_id, n):
+    update = {
+        "update_id": n,
+        "message": {
+            "message_id": n,
+            "chat": {"id": chat_id, "type": "private"},
+            "date": 0,
+            "text": "test",
+        },
+    }
+    return botogram.runner.jobs.Job("bot", None, {"update": update})
+
+
+def _receipts(jobs):
+    return [(job.bot_id, None, job.chat) for job in jobs]
+
+
+def test_chat_order():
+    commands = botogram.runner.jobs.JobsCommands(workers=2, chat_order=True)
+    replies = []
+
+    commands.get((0, 10, []), replies.append)
+    commands.get((1, 10, []), replies.append)
+    commands.bulk_put([_chat_job(2, 1), _chat_job(2, 2), _chat_job(2, 3),
+                       _chat_job(4, 4), _chat_job(5, 5)], lambda _: None)
+
+    # Each chat has only one running job, and the chats are sharded between
+    # the workers by their ID
+    first, second = replies
+    assert [job.metadata["update"]["update_id"] for job in first] == [1, 4]
+    assert [job.metadata["update"]["update_id"] for job in second] == [5]
+
+    # The next jobs of a chat are available only after the previous ones
+    # are processed, even to other workers
+    commands.get((1, 10, _receipts(second)), replies.append)
+    assert len(replies) == 2
+    commands.done(_receipts(first), replies.append)
+    assert replies[2][0].metadata["update"]["update_id"] == 2
+    assert replies[3] is None
+
+    # Workers wait for the blocked jobs even when the queue is shut down
+    commands.shutdown(None, replies.append)
+    commands.get((0, 10, []), replies.append)
+    assert replies[4:] == [None]
+    commands.get((1, 10, _receipts(replies[2])), replies.append)
+    assert replies[5][0].metadata["update"]["update_id"] == 3
+    commands.get((1, 10, _receipts(replies[5])), replies.append)
+    assert replies[6:] == ["__stop__", "__stop__"]
+
+
+def test_chat_order_requeue():
+    commands = botogram.runner.jobs.JobsCommands(workers=2, chat_order=True)
+    replies = []
+
+    def broken(jobs):
+        raise OSError("The worker died")
+
+    # Jobs sent to a dead worker are put back in their chats, in order
+    commands.get((0, 10, []), broken)
+    commands.bulk_put([_chat_job(2, 1), _chat_job(2, 2), _chat_job(4, 3)],
+                      lambda _: None)
+    assert commands._running_chats == set()
+    assert commands._ready_lanes == {("bot", 2): 1, ("bot", 4): 1}
+
+    commands.get((0, 10, []), replies.append)
+    assert _update_ids(replies[0]) == [1, 3]
+    assert commands._ready_lanes == {}
+    commands.get((0, 10, _receipts(replies[0])), replies.append)
+    assert _update_ids(replies[1]) == [2]
+
+
+def _callback_job(n):
+    update = {
+        "update_id": n,
+        "callback_query": {
+            "id": str(n),
+            "from": {"id": n, "first_name": "test"},
+            "chat_instance": "test",
+            "data": "test",
+        },
+    }
+    return botogram.runner.jobs.Job("bot", None, {"update": update})
+
+
+def _update_ids(jobs):
+    return [job.metadata["update"]["update_id"] for job in jobs]
+
+
+def test_priorities():
+    commands = botogram.runner.jobs.JobsCommands()
+    replies = []
+
+    # Callback queries are processed before the queued messages
+    commands.bulk_put([_chat_job(1, 1), _chat_job(1, 2), _callback_job(3)],
+                      lambda _: None)
+    commands.get((0, 2, []), replies.append)
+    assert _update_ids(replies[0]) == [3, 1]
+
+    commands.stats(None, replies.append)
+    assert replies[1] == {
+        "lanes": {"high": 0, "normal": 1, "low": 0},
+        "running_chats": 0,
+        "waiting_workers": 0,
+    }
+
+    # The priorities can be changed
+    commands = botogram.runner.jobs.JobsCommands(priorities={
+        "callback_query": "low",
+    })
+    commands.bulk_put([_callback_job(1), _chat_job(1, 2)], lambda _: None)
+    commands.get((0, 2, []), replies.append)
+    assert _update_ids(replies[2]) == [2, 1]
+
+
+def test_priorities_starvation():
+    commands = botogram.runner.jobs.JobsCommands(workers=2, chat_order=True)
+    replies = []
+
+    commands.bulk_put([_chat_job(2, 1), _chat_job(3, 2), _callback_job(3)],
+                      lambda _: None)
+
+    # Jobs waiting for too much are processed before the other ones
+    for job in commands._chats[("bot", 2)]:
+        job.queued_at -= botogram.runner.jobs.MAX_LANE_WAIT + 1
+    commands.get((0, 3, []), replies.append)
+    assert _update_ids(replies[0]) == [1, 3, 2]
+
+
+def test_process_update(bot):
+    processed = []
+
+    @bot.process_message
+    def process(chat, message):
+        processed.append(message)
+
+    # Updates are parsed only by the workers, which route them using just
+    # the raw JSON received from Telegram
+    job = _chat_job(2, 1)
+    assert botogram.runner.jobs._job_chat(job) == ("bot", 2)
+    assert botogram.runner.jobs._job_chat(_callback_job(2)) is None
+    assert botogram.runner.jobs._job_kind(job) == "message"
+
+    job.func = botogram.runner.jobs.process_update
+    job.process({"bot": bot.freeze()})
+    assert isinstance(processed[0], botogram.objects.Message)
+    assert processed[0].chat.id == 2
+    assert processed[0]._api is bot.api
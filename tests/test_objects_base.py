@@ -18,8 +18,13 @@
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #   DEALINGS IN THE SOFTWARE.
 
+import os
+import subprocess
+import sys
+
 import pytest
 
+import botogram
 import botogram.objects.base as objectsbase
 
 
@@ -43,6 +48,20 @@ class ObjectToTest(objectsbase.BaseObject):
     }
 
 
+class ObjectWithReplacedKeys(objectsbase.BaseObject):
+
+    required = {
+        "from": int,
+    }
+    optional = {
+        "parent": objectsbase._itself,
+        "has space": str,
+    }
+    replace_keys = {
+        "from": "sender",
+    }
+
+
 def test_object_creation():
     # First of all provide everything needed plus an optional field
     obj = ObjectToTest({"test1": 42, "test2": {"test1": 98}, "test3": "test"})
@@ -73,6 +92,18 @@ def test_object_creation():
     assert obj.test4[2].test1 == 3
 
 
+def test_object_creation_replaced_keys(api):
+    obj = ObjectWithReplacedKeys({"from": 1, "parent": {"from": 2}}, api)
+    assert obj.sender == 1
+    assert obj.parent.sender == 2
+    assert obj.parent.parent is None
+    assert obj.parent._api == api
+    assert getattr(obj, "has space") is None
+
+    with pytest.raises(ValueError):
+        ObjectWithReplacedKeys({"parent": {"from": 2}})
+
+
 def test_provide_api(api):
     data = {"test1": 42, "test2": {"test1": 98}, "test4": [{"test1": 1},
            {"test1": 2}, {"test1": 3}], "test5": {"test1": 4}}
@@ -95,3 +126,54 @@ def test_serialize():
 
     # Try to load this and serialize it
     assert ObjectToTest(data).serialize() == data
+
+
+def test_compact_slots():
+    namespace = {
+        "required": {"from": int, "id": int},
+        "optional": {"has space": str, "name": str},
+        "replace_keys": {"from": "sender"},
+        "_extra_slots_": ("_cache",),
+        "name": property(lambda self: None),
+    }
+
+    # Existing slots, names defined in the class and invalid names are
+    # skipped
+    slots = objectsbase._slots((objectsbase.BaseObject,), namespace)
+    assert slots == ("sender", "id", "_cache")
+
+
+LAZY_CHECK = """
+import botogram.objects
+update = botogram.objects.Update({"update_id": 1, "message": {
+    "message_id": 2, "chat": {"id": 3, "type": "private"}, "date": 4,
+    "text": "hi", "from": {"id": 5, "first_name": "test"},
+    "entities": [{"type": "bold", "offset": 0, "length": 2}],
+}})
+update.set_api("api")
+assert "message" in update._lazy
+assert update.message.sender.first_name == "test"
+assert update.message.sender._api == "api"
+assert update.edited_message is None
+assert update._lazy == {}
+
+# The entities are parsed only when they're used
+assert "_parsed_text" in update.message._lazy
+assert update.message.parsed_text[0].text == "hi"
+
+# The type of the lazy fields is still checked right away
+try:
+    botogram.objects.Update({"update_id": 1, "message": "nope"})
+except ValueError:
+    pass
+else:
+    raise AssertionError("invalid types must be rejected")
+"""
+
+
+def test_lazy_objects():
+    # The mode is chosen when botogram is imported
+    root = os.path.dirname(os.path.dirname(botogram.__file__))
+    env = dict(os.environ, BOTOGRAM_LAZY_OBJECTS="1", PYTHONPATH=root)
+    subprocess.check_call([sys.executable, "-c", LAZY_CHECK], env=env)
+
@@ -18,11 +18,17 @@
 #   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #   DEALINGS IN THE SOFTWARE.
 
+import base64
+import struct
+
 import pytest
+import responses
 
 import botogram.objects.messages
 import botogram.objects.chats
 
+import conftest
+
 
 def get_dummy_message(text):
     """Get a dummy message with a custom text"""
@@ -302,3 +308,43 @@ def test_parsed_text_filter():
         ("mention", "@mentioned"),
         ("hashtag", "#something"),
     ]
+
+
+#######################
+##  Inline messages  ##
+#######################
+
+
+def test_inline_message_chat(api):
+    inline_message_id = base64.urlsafe_b64encode(
+        struct.pack("<iiiq", 2, 10, -123, 0),
+    ).decode("ascii").rstrip("=")
+    chat = {"id": -100123, "type": "supergroup", "title": "Something"}
+
+    with responses.RequestsMock() as mocker:
+        mocker.add("POST", "https://api.telegram.org/bot" + conftest.API_KEY +
+                   "/getChat", json={"ok": True, "result": chat})
+
+        # The chat isn't fetched when the message is created
+        message = botogram.objects.messages.Message({
+            "inline_message_id": inline_message_id,
+        }, api)
+        assert message.is_inline
+        assert message.id == 10
+        assert len(mocker.calls) == 0
+
+        # It's fetched only once, even by other messages
+        assert message.chat.title == "Something"
+        assert message.chat is message.chat
+        other = botogram.objects.messages.Message({
+            "inline_message_id": inline_message_id,
+        }, api)
+        assert other.chat.id == -100123
+        assert len(mocker.calls) == 1
+
+    # Without an API only the ID of the chat is known
+    message = botogram.objects.messages.Message({
+        "inline_message_id": inline_message_id,
+    })
+    assert message.chat.id == -100123
+    assert message.chat.title is None
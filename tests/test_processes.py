@@ -0,0 +1,122 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+
+import ast
+import os
+import queue
+import sys
+import threading
+
+import pytest
+
+import botogram.runner.asyncworker
+import botogram.runner.jobs
+import botogram.runner.processes
+
+
+def _updater(frozenbot, fetch, on_command=None):
+    updater = botogram.runner.processes.UpdaterProcess(None, frozenbot,
+                                                       queue.Queue())
+    updater.fetcher.fetch = fetch
+
+    class FakeIPC:
+        def __init__(self):
+            self.commands = []
+
+        def command(self, command, data):
+            if on_command is not None:
+                on_command()
+            self.commands.append(command)
+
+    updater.ipc = FakeIPC()
+    return updater
+
+
+def test_updater_terminate(frozenbot):
+    # Terminating the updater while it waits for the updates stops it right
+    # away, since they aren't confirmed to Telegram yet
+    updater = _updater(frozenbot, lambda timeout: updater.on_terminate())
+    with pytest.raises(KeyboardInterrupt):
+        updater.loop()
+    assert updater.stop
+    assert not updater.fetching
+    assert updater.ipc.commands == []
+
+    # Otherwise the fetched updates are submitted before stopping
+    updater = _updater(frozenbot, lambda timeout: [{"update_id": 1}],
+                       lambda: updater.on_terminate())
+    updater.loop()
+    assert updater.stop
+    assert updater.should_stop()
+    assert updater.ipc.commands == ["jobs.bulk_put"]
+
+
+def test_async_worker():
+    # All the jobs must be running at the same time to pass the barrier
+    barrier = threading.Barrier(4, timeout=5)
+
+    def func(bot, metadata):
+        barrier.wait()
+
+    jobs = []
+    for i in range(4):
+        job = botogram.runner.jobs.Job("bot", func, {
+            "ack": True, "update": {"update_id": i},
+        })
+        jobs.append(job)
+    batches = [jobs, "__stop__"]
+
+    class FakeIPC:
+        def __init__(self):
+            self.done = []
+            self.lock = threading.Lock()
+
+        def command(self, command, data):
+            if command == "jobs.get":
+                return batches.pop(0)
+            with self.lock:
+                self.done.extend(data)
+
+    worker = botogram.runner.asyncworker.AsyncWorkerProcess(
+        ("localhost", b"key"), {"bot": None}, 4, 4,
+    )
+    worker.ipc = FakeIPC()
+    worker.loop()
+
+    assert worker.stop
+    assert not barrier.broken
+    assert sorted(worker.ipc.done) == [("bot", i, None) for i in range(4)]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason="ast.parse() can't check older grammars")
+def test_async_worker_imported_lazily():
+    # Only the asynchronous worker uses async/await, so the rest of botogram
+    # must keep working on Python 3.4
+    root = os.path.dirname(botogram.__file__)
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            if not name.endswith(".py") or name == "asyncworker.py":
+                continue
+
+            with open(path) as f:
+                ast.parse(f.read(), path, feature_version=(3, 4))
@@ -0,0 +1,108 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import pickle
+
+import pytest
+
+import botogram.ratelimit
+import botogram.runner.ratelimit
+
+
+def test_token_bucket():
+    bucket = botogram.ratelimit.TokenBucket(2, 1)
+
+    # The bucket starts full
+    assert bucket.delay(0) == 0
+    bucket.consume(0)
+    assert bucket.delay(0) == 0
+    bucket.consume(0)
+
+    # Then the caller needs to wait for a new token
+    assert bucket.delay(0) == 0.5
+    bucket.consume(0)
+    assert bucket.delay(0) == 1
+    assert not bucket.idle(0)
+
+    # Tokens are refilled over time, up to the capacity
+    assert bucket.delay(1) == 0
+    assert bucket.idle(10)
+    assert bucket.tokens == 2
+
+
+def test_rate_limiter():
+    limiter = botogram.ratelimit.RateLimiter(
+        global_limit=(3, 1), chat_limit=(1, 1), group_limit=(2, 60),
+    )
+
+    # Messages to different chats are limited only by the global limit
+    assert limiter.reserve(1, now=0) == 0
+    assert limiter.reserve(2, now=0) == 0
+    assert limiter.reserve(3, now=0) == 0
+    assert limiter.reserve(4, now=0) == 1 / 3
+
+    # Messages to the same chat are queued
+    assert limiter.reserve(5, now=10) == 0
+    assert limiter.reserve(5, now=10) == 1
+    assert limiter.reserve(5, now=10) == 2
+
+    # Groups also have a stricter limit
+    assert limiter.reserve(-1, now=20) == 0
+    assert limiter.reserve(-1, now=21) == 0
+    assert limiter.reserve(-1, now=22) == pytest.approx(28)
+
+    # Methods which don't send messages aren't limited
+    assert botogram.ratelimit.is_limited("sendMessage")
+    assert botogram.ratelimit.is_limited("forwardMessage")
+    assert not botogram.ratelimit.is_limited("sendChatAction")
+    assert not botogram.ratelimit.is_limited("getMe")
+
+
+def test_rate_limiter_cleanup():
+    limiter = botogram.ratelimit.RateLimiter()
+    limiter.reserve(1, now=0)
+    limiter.reserve(-1, now=0)
+    assert 1 in limiter._chats
+    assert -1 in limiter._groups
+
+    limiter._cleanup(now=1000)
+    assert not limiter._chats
+    assert not limiter._groups
+
+
+def test_rate_limiter_pickle():
+    limiter = botogram.ratelimit.RateLimiter(global_limit=(10, 1))
+    limiter.reserve(1)
+
+    restored = pickle.loads(pickle.dumps(limiter))
+    assert restored.global_limit == (10, 1)
+    assert restored.reserve(1) == 0
+
+
+def test_rate_limit_commands():
+    limiter = botogram.ratelimit.RateLimiter(chat_limit=(1, 10))
+    commands = botogram.runner.ratelimit.RateLimitCommands({"bot": limiter})
+
+    replies = []
+    commands.reserve(("bot", 1), replies.append)
+    commands.reserve(("bot", 1), replies.append)
+
+    assert replies[0] == 0
+    assert 9 < replies[1] <= 10
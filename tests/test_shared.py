@@ -20,8 +20,11 @@
 
 import pickle
 
+import pytest
+
 import botogram.shared
 import botogram.hooks
+import botogram.runner.shared
 
 
 def test_shared_memory_creation():
@@ -109,3 +112,104 @@ def test_switch_driver():
     assert shared.driver == driver
     assert shared.of("bot1", "test1")["a"] == "b"
     assert shared.of("bot1", "test2")["b"] == "c"
+
+
+def _cached_driver(commands, consistency="read-your-writes"):
+    driver = botogram.runner.shared.CachedMultiprocessingDriver(consistency)
+
+    # Send the commands directly to the IPC commands, copying the data as the
+    # IPC transport does
+    def command(name, data):
+        replies = []
+        method = getattr(commands, name.split(".", 1)[1])
+        method(pickle.loads(pickle.dumps(data)), replies.append)
+        return pickle.loads(pickle.dumps(replies[0]))
+
+    driver._command = command
+    return driver
+
+
+def test_cached_driver():
+    commands = botogram.runner.shared.SharedMemoryCommands()
+    first = botogram.shared.SharedMemory(_cached_driver(commands))
+    second = botogram.shared.SharedMemory(_cached_driver(commands))
+
+    # Writes are visible right away to the worker which made them, and to
+    # the other workers as soon as they get the memory again
+    memory1 = first.of("bot1", "comp1")
+    memory2 = second.of("bot1", "comp1")
+    memory1["a"] = 1
+    assert memory1["a"] == 1
+    assert "a" not in memory2
+    assert second.of("bot1", "comp1")["a"] == 1
+
+    # Writes made with an outdated copy don't lose the other changes
+    memory1["b"] = 2
+    memory2["c"] = 3
+    assert dict(memory2) == {"a": 1, "b": 2, "c": 3}
+    del memory2["a"]
+    assert dict(first.of("bot1", "comp1")) == {"b": 2, "c": 3}
+    replies = []
+    commands.cache_get(("bot1:comp1", None), replies.append)
+    assert replies == [(4, {"b": 2, "c": 3}, False)]
+
+    assert hasattr(memory1, "lock")
+    with pytest.raises(KeyError):
+        del memory1["a"]
+
+    # Changing the values in place doesn't change the copies, which would
+    # otherwise differ between the workers
+    value = {"list": []}
+    memory1["d"] = value
+    value["list"].append(1)
+    memory1["d"]["list"].append(2)
+    memory1.get("d")["list"].append(3)
+    assert memory1["d"] == {"list": []}
+    assert second.of("bot1", "comp1")["d"] == {"list": []}
+
+    # The changes are shared by storing the values again
+    value = memory1["d"]
+    value["list"].append(1)
+    memory1["d"] = value
+    assert second.of("bot1", "comp1")["d"] == {"list": [1]}
+
+
+def test_cached_driver_eventual():
+    commands = botogram.runner.shared.SharedMemoryCommands()
+    first = botogram.shared.SharedMemory(_cached_driver(commands, "eventual"))
+    second = botogram.shared.SharedMemory(_cached_driver(commands, "eventual"))
+
+    first.of("bot1", "comp1")["a"] = 1
+    memory2 = second.of("bot1", "comp1")
+    assert memory2["a"] == 1
+
+    # Changes made by other workers are seen only when the copy is too old
+    first.of("bot1", "comp1")["a"] = 2
+    assert second.of("bot1", "comp1")["a"] == 1
+    memory2._synced_at -= botogram.runner.shared.CACHE_MAX_STALENESS
+    assert second.of("bot1", "comp1")["a"] == 2
+
+    # Acquiring a lock shows the changes made by who held it before
+    first.of("bot1", "comp1")["a"] = 3
+    second.driver.lock_acquire("bot1:comp1:lock")
+    assert memory2["a"] == 3
+
+    with pytest.raises(ValueError):
+        botogram.runner.shared.CachedMultiprocessingDriver("strong")
+
+
+def test_lock_handoff():
+    commands = botogram.runner.shared.SharedMemoryCommands()
+    replies = []
+
+    commands.lock_acquire("lock", replies.append)
+    commands.lock_acquire("lock", lambda _: replies.append("second"))
+    assert replies == [None]
+
+    # The lock is given to the waiting process, so it's still acquired
+    commands.lock_release("lock", replies.append)
+    assert replies == [None, "second", None]
+    commands.lock_status("lock", replies.append)
+    assert replies[-1] is True
+    commands.lock_acquire("lock", lambda _: replies.append("third"))
+    assert "third" not in replies
@@ -80,3 +80,13 @@ def test_guess_syntax():
     assert botogram.syntaxes.guess_syntax("no syntax, sorry!", None) is None
     assert botogram.syntaxes.guess_syntax("*markdown*", None) == "Markdown"
     assert botogram.syntaxes.guess_syntax("<b>html</b>", None) == "HTML"
+
+
+def test_long_messages():
+    # Those used to backtrack for seconds
+    assert not botogram.syntaxes.is_markdown("[a](" * 1024)
+    assert botogram.syntaxes.is_markdown("[a](" * 1024 + ")")
+    assert not botogram.syntaxes.is_html("<b>" * 1365)
+    assert botogram.syntaxes.is_html("<b>" * 1365 + "</b>")
+    assert not botogram.syntaxes.is_markdown("a" * 4096)
+    assert botogram.syntaxes.is_markdown("a" * 4096 + "@example.com *a*")
@@ -0,0 +1,86 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import json
+
+import responses
+
+import botogram.updates
+import conftest
+
+
+def test_allowed_updates(bot):
+    # Only messages are processed by the default hooks
+    assert botogram.updates.allowed_updates(bot) == ["message"]
+
+    @bot.callback("test")
+    def callback(query):
+        pass
+
+    allowed = botogram.updates.allowed_updates(bot.freeze())
+    assert sorted(allowed) == ["callback_query", "message"]
+
+    # Updates handled by custom processors are always received
+    bot.register_update_processor("edited_message", lambda *_: None)
+    allowed = botogram.updates.allowed_updates(bot)
+    assert sorted(allowed) == ["callback_query", "edited_message", "message"]
+
+
+def test_adaptive_timeout(bot):
+    bot.process_backlog = True
+    fetcher = botogram.updates.UpdatesFetcher(bot.freeze(), max_timeout=4,
+                                              limit=10)
+
+    results = [[], [], [], [], [{"update_id": 1}], []]
+    bodies = []
+
+    def get_updates(request):
+        bodies.append(json.loads(request.body.decode("utf-8")))
+        return 200, {}, json.dumps({"ok": True, "result": results.pop(0)})
+
+    with responses.RequestsMock() as mocker:
+        mocker.add_callback("POST", "https://api.telegram.org/bot" +
+                            conftest.API_KEY + "/getUpdates",
+                            callback=get_updates,
+                            content_type="application/json")
+
+        while results:
+            fetcher.fetch()
+
+    # The timeout grows while the bot is idle, and resets with new updates
+    assert [body["timeout"] for body in bodies] == [1, 2, 4, 4, 4, 1]
+    assert bodies[-1]["offset"] == 2
+    assert bodies[-1]["limit"] == 10
+    assert bodies[-1]["allowed_updates"] == ["message"]
+
+
+def test_raw_updates(bot):
+    bot.process_backlog = True
+    fetcher = botogram.updates.UpdatesFetcher(bot.freeze(), raw=True)
+    update = {"update_id": 5, "message": {"message_id": 1, "date": 0,
+                                          "chat": {"id": 1, "type": "group"}}}
+
+    with responses.RequestsMock() as mocker:
+        mocker.add("POST", "https://api.telegram.org/bot" + conftest.API_KEY +
+                   "/getUpdates", json={"ok": True, "result": [update]})
+
+        # Raw updates aren't parsed, but the offset is still updated
+        assert fetcher.fetch() == [update]
+        assert fetcher._last_id == 5
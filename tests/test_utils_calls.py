@@ -107,3 +107,17 @@ def test_call_lazy_arguments():
     botogram.utils.call(myfunc2, a=1, b=lazy)
     assert myfunc2_called
     assert myarg_called
+
+
+def test_call_plan():
+    def myfunc(a, b=2):
+        return a, b
+
+    # The signature of the function is resolved only once
+    plan = botogram.utils.call_plan(myfunc)
+    assert plan is botogram.utils.call_plan(myfunc)
+    assert plan.names == {"a", "b"}
+
+    assert plan.call(myfunc, {"a": 1, "c": 3}) == (1, 2)
+    with pytest.raises(TypeError):
+        plan.call(myfunc, {"b": 1})
@@ -0,0 +1,134 @@
+# Copyright (c) 2015-2019 The Botogram Authors (see AUTHORS)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in
+#   all copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#   FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#   DEALINGS IN THE SOFTWARE.
+
+import http.client
+import json
+import socket
+import threading
+import time
+
+import botogram.runner.jobs
+import botogram.runner.webhook
+
+
+def post(server, path, body, token=None):
+    """Send a request to the webhook server"""
+    headers = {"Content-Type": "application/json"}
+    if token is not None:
+        headers[botogram.runner.webhook.SECRET_TOKEN_HEADER] = token
+
+    # The server handles one request in a separate thread
+    thread = threading.Thread(target=server.handle_request)
+    thread.start()
+
+    conn = http.client.HTTPConnection(*server.server_address)
+    try:
+        conn.request("POST", path, body, headers)
+        return conn.getresponse().status
+    finally:
+        conn.close()
+        thread.join()
+
+
+def test_webhook_server(frozenbot):
+    received = []
+    server = botogram.runner.webhook.WebhookServer(
+        [frozenbot], ("127.0.0.1", 0), received.extend,
+    )
+    path, token = botogram.runner.webhook.secrets(frozenbot)
+    body = json.dumps({
+        "update_id": 1,
+        "message": {
+            "message_id": 2,
+            "chat": {"id": -1, "type": "group", "title": "test"},
+            "from": {"id": 3, "first_name": "test"},
+            "date": 4,
+            "text": "test",
+        },
+    })
+
+    try:
+        # Requests to the wrong path, or without the secret, are rejected
+        assert post(server, "/wrong", body, token) == 404
+        assert post(server, path, body) == 403
+        assert post(server, path, body, "wrong") == 403
+        assert post(server, path, "{not json", token) == 400
+        assert post(server, path, "{}", token) == 400
+        assert not received
+
+        # Valid updates are submitted as jobs
+        assert post(server, path, body, token) == 200
+    finally:
+        server.server_close()
+
+    assert len(received) == 1
+    assert received[0].bot_id == frozenbot._bot_id
+    assert received[0].func is botogram.runner.jobs.process_update
+    assert received[0].metadata["update"] == json.loads(body)
+
+
+def test_webhook_idle_clients(frozenbot, monkeypatch):
+    assert botogram.runner.webhook.WebhookHandler.timeout is not None
+    monkeypatch.setattr(botogram.runner.webhook.WebhookHandler, "timeout", 2)
+
+    received = []
+    server = botogram.runner.webhook.WebhookServer(
+        [frozenbot], ("127.0.0.1", 0), received.extend,
+    )
+    path, token = botogram.runner.webhook.secrets(frozenbot)
+
+    idle = socket.create_connection(server.server_address)
+    slow = socket.create_connection(server.server_address)
+    try:
+        server.handle_request()
+        server.handle_request()
+
+        # A client sending a body shorter than its Content-Length
+        slow.sendall(("POST %s HTTP/1.1\r\nContent-Length: 100\r\n%s: %s"
+                      "\r\n\r\n{" % (
+                          path, botogram.runner.webhook.SECRET_TOKEN_HEADER,
+                          token,
+                      )).encode("utf-8"))
+
+        # Other requests are handled while the clients are connected
+        start = time.monotonic()
+        assert post(server, path, json.dumps({"update_id": 1}), token) == 200
+        assert time.monotonic() - start < 1
+        assert len(received) == 1
+
+        # And the clients are disconnected after the timeout
+        for client in idle, slow:
+            client.settimeout(5)
+            assert client.recv(1024) == b""
+    finally:
+        idle.close()
+        slow.close()
+        server.server_close()
+
+    assert len(received) == 1
+
+
+def test_webhook_secrets(frozenbot):
+    path, token = botogram.runner.webhook.secrets(frozenbot)
+
+    # Secrets are stable, and valid for the Telegram API
+    assert (path, token) == botogram.runner.webhook.secrets(frozenbot)
+    assert path.startswith("/")
+    assert token.isalnum()